@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import chat_history
+import chatbot
+import data_backend
+import llm_backend
+
+# Stateless HTTP API for the chatbot pipeline, independent of Streamlit.
+#
+# Usage:
+#   python api.py --host 0.0.0.0 --port 8000 --workers 4
+#
+# Endpoints:
+#   GET  /health       liveness check
+#   POST /chat         {"question": ..., "history": ...} -> the answered turn as JSON
+#   POST /chat/stream  same request, answered as NDJSON events while stages finish
+#
+# `history` is optional: either the context string from chat_history.build_context or
+# a list of {"role", "content"} messages, which is bounded the same way. No
+# conversation state is kept on the server, so any worker can serve any request.
+# Each worker process holds one Mongo client (its connection pool) and one LLM client,
+# shared by a thread pool that runs the blocking pipeline stages.
+
+API_THREADS = int(os.getenv("API_THREADS", "16"))
+
+
+def _dumps(value):
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+async def _read_request(request):
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return None, JSONResponse({"error": "Request body must be JSON."}, status_code=400)
+    question = body.get("question") if isinstance(body, dict) else None
+    if not isinstance(question, str) or not question.strip():
+        return None, JSONResponse({"error": "'question' must be a non-empty string."}, status_code=400)
+    history = body.get("history") or ""
+    if isinstance(history, list):
+        history = chat_history.build_context(history[-chat_history.CONTEXT_MESSAGES:])
+    return (question, history), None
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+
+async def chat(request):
+    parsed, error = await _read_request(request)
+    if error:
+        return error
+    question, history = parsed
+    loop = asyncio.get_running_loop()
+    turn = await loop.run_in_executor(
+        request.app.state.executor, chatbot.answer_question, question, data_backend.get_database(), history)
+    return Response(_dumps(turn), media_type="application/json")
+
+
+async def chat_stream(request):
+    parsed, error = await _read_request(request)
+    if error:
+        return error
+    question, history = parsed
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    # The pipeline runs in one worker thread (its trace context lives there) and hands
+    # each event to the event loop as soon as the stage producing it has finished.
+    def produce():
+        try:
+            for event in chatbot.iter_answer(question, data_backend.get_database(), history):
+                if cancelled.is_set():
+                    return
+                if event["event"] == "done":
+                    turn = event["turn"]
+                    event = {"event": "done", "response": turn["content"], "error": turn["error"],
+                             "timings_ms": {span["name"]: span["durationMs"] for span in turn["trace"]}}
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, {"event": "done", "response": None, "error": str(e)})
+
+    async def events():
+        future = loop.run_in_executor(request.app.state.executor, produce)
+        try:
+            while True:
+                event = await queue.get()
+                yield _dumps(event) + "\n"
+                if event["event"] == "done":
+                    break
+        finally:
+            cancelled.set()
+            await future
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Per-worker clients are created up front so the first request does not pay for them
+    app.state.executor = ThreadPoolExecutor(max_workers=API_THREADS, thread_name_prefix="chat")
+    await asyncio.get_running_loop().run_in_executor(app.state.executor, data_backend.get_database)
+    try:
+        await asyncio.get_running_loop().run_in_executor(app.state.executor, llm_backend.get_llm)
+    except ValueError:
+        pass  # missing credentials surface as per-request errors instead of a failed boot
+    yield
+    app.state.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/chat", chat, methods=["POST"]),
+        Route("/chat/stream", chat_stream, methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the chatbot pipeline over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "1")),
+                        help="Worker processes, each with its own Mongo and LLM clients")
+    args = parser.parse_args()
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
@@ -1,29 +1,32 @@
 import streamlit as st
-from pymongo import MongoClient
 import pandas as pd
 from dotenv import load_dotenv
 import os
-import openai
 import chatbot  # Import the chatbot module
 import dashboard  # Import the dashboard module
-from openai import OpenAI
+import data_backend
+import warmup
+import export_static
 
 # Set page configuration (must be the first Streamlit command)
 st.set_page_config(page_title="Data Visionaries", page_icon=":bar_chart:", layout="wide")
 
 
 
-# MongoDB setup
-mongo_url = "MONGODB URL HERE"
-mongo_client = MongoClient(mongo_url)
-database = mongo_client["RAG"]
+# Data setup (DATA_BACKEND=mongo|local|mongomock, see data_backend.py)
+database = data_backend.get_database()
 
+# Directory of static dashboard bundles (see export_static.py); when set together with
+# SNAPSHOT_DIR, the dashboard is served from the bundle built from the current snapshot
+DASHBOARD_BUNDLE_DIR = os.getenv("DASHBOARD_BUNDLE_DIR")
 
-# OpenAI client setup
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY environment variable is not set.")
-client = OpenAI(api_key=api_key)
+# Prebuild dashboard data, figures and chatbot artifacts in the background (see warmup.py);
+# Streamlit reruns this script on every interaction, the warm-up starts only on the first
+warmup.start_once(database)
+
+
+# The LLM client is created lazily by llm_backend.get_llm() on the first chatbot question,
+# so the dashboard and replayed chat sessions work without OPENAI_API_KEY.
 
 # Fetch data (placeholder for the actual implementation)
 def fetch_collection_as_df(collection_name):
@@ -49,6 +52,12 @@ def home_page():
         if st.button("Go to Dashboard"):
             st.session_state.page = "dashboard"
 
+    # Refresh anything that went stale while the user picks a section
+    progress = warmup.start(database).progress()
+    if progress["state"] == "running" and progress["total"]:
+        st.progress(progress["done"] / progress["total"],
+                    text=f"Preparing the dashboard and chatbot in the background ({progress['done']}/{progress['total']})")
+
 # Navigation Buttons with Home Button/Logo
 def navigation_buttons():
     col1, col2 = st.columns([8.5, 1.5])  # Home button/logo on the left
@@ -57,6 +66,11 @@ def navigation_buttons():
             st.session_state.page = "home"
     return
 
+# Dashboard served from a prebuilt static bundle: no database reads and no pipeline
+def dashboard_viewer_page(bundle):
+    dashboard.render_dashboard(bundle["data"], bundle["firm_options"])
+    st.caption(f"Served from the static snapshot {bundle['manifest']['version']}")
+
 # Main App Logic
 def main():
     # Initialize session state for page navigation
@@ -71,7 +85,11 @@ def main():
         chatbot.chatbot_page(database)  # Call the chatbot function
     elif st.session_state.page == "dashboard":
         navigation_buttons()  # Add Home button at the top
-        dashboard.dashboard_page(database)  # Call the dashboard function
+        bundle = export_static.current_bundle(DASHBOARD_BUNDLE_DIR) if DASHBOARD_BUNDLE_DIR else None
+        if bundle:
+            dashboard_viewer_page(bundle)
+        else:
+            dashboard.dashboard_page(database)  # Call the dashboard function
 
 if __name__ == "__main__":
     main()
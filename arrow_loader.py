@@ -0,0 +1,93 @@
+import pandas as pd
+import pyarrow as pa
+
+# Columnar loader for the dashboard collections. Each collection is loaded into an
+# Arrow table with a declared schema, which is handed to pandas with Arrow-backed
+# dtypes (pd.ArrowDtype), so the column buffers are shared with the table rather than
+# copied into object arrays.
+#
+# Decoding strategies, fastest first:
+#   - PyMongoArrow (find_arrow_all, in requirements.txt) for pymongo collections: BSON
+#     is decoded to Arrow in C without Python objects
+#   - pymongo find_raw_batches without PyMongoArrow: each raw BSON batch is decoded to
+#     Python dicts and converted to Arrow arrays, so only one batch of dicts is alive
+#     at a time (not Arrow-native, just bounded in memory)
+#   - any other collection (local, mongomock): find() consumed in batches, converted
+#     the same way
+
+BATCH_SIZE = 2000
+
+SCHEMAS = {
+    "articles": pa.schema([
+        ("firm", pa.string()), ("area", pa.string()), ("title", pa.string()), ("body", pa.string()),
+    ]),
+    "careers": pa.schema([
+        ("firm", pa.string()), ("position", pa.string()), ("location", pa.string()),
+        ("experience", pa.string()), ("compensation", pa.string()), ("pay type", pa.string()),
+    ]),
+    "teams": pa.schema([
+        ("name", pa.string()), ("firm", pa.string()), ("position", pa.string()), ("email", pa.string()),
+        ("phone", pa.string()), ("about", pa.string()), ("education", pa.string()),
+        ("achievements", pa.string()), ("affiliations", pa.string()), ("admissions", pa.string()),
+    ]),
+    "practices": pa.schema([
+        ("firm", pa.string()), ("title", pa.string()), ("standardized_title", pa.string()),
+        ("specializations", pa.string()), ("team members", pa.string()), ("leaders", pa.string()),
+    ]),
+}
+
+
+def _coerce(value, type_):
+    # Values stored with another BSON type than declared (a list, a number) keep their text
+    if value is None or not pa.types.is_string(type_) or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _record_batch(documents, schema):
+    try:
+        return pa.RecordBatch.from_pylist(documents, schema=schema)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.RecordBatch.from_pylist(
+            [{field.name: _coerce(doc.get(field.name), field.type) for field in schema} for doc in documents],
+            schema=schema,
+        )
+
+
+def _batches(collection, schema, batch_size):
+    projection = {field.name: 1 for field in schema}
+    projection["_id"] = 0
+    if hasattr(collection, "find_raw_batches"):
+        import bson
+        for raw in collection.find_raw_batches({}, projection, batch_size=batch_size):
+            yield bson.decode_all(raw)
+        return
+    # Undeclared fields are skipped while building the arrays, so no projection is needed here
+    batch = []
+    for doc in collection.find().batch_size(batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_collection_arrow(collection, schema, batch_size=BATCH_SIZE):
+    if type(collection).__module__.startswith("pymongo"):
+        try:
+            from pymongoarrow.api import Schema, find_arrow_all
+        except ImportError:
+            pass
+        else:
+            return find_arrow_all(collection, {}, schema=Schema.from_arrow(schema), projection={"_id": 0})
+    return pa.Table.from_batches(
+        [_record_batch(documents, schema) for documents in _batches(collection, schema, batch_size)],
+        schema=schema,
+    )
+
+
+# Arrow-backed counterpart of dashboard.fetch_collection_as_df
+def fetch_collection_as_arrow_df(collection_name, db):
+    table = load_collection_arrow(db[collection_name], SCHEMAS[collection_name])
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
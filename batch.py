@@ -0,0 +1,149 @@
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import chatbot
+import data_backend
+import llm_scheduler
+from ratelimit import TokenBucket
+
+# Batch question answering: runs every question of a JSONL file through
+# chatbot.answer_question with a bounded worker pool.
+#
+# Usage:
+#   python batch.py questions.jsonl --output answers.jsonl --workers 4 --rate 2
+#
+# Each input line is a JSON object with a "question" (or "query"/"title"/"body")
+# field and optionally an "id" (or "request_id"); lines without an id are numbered.
+# Every answer is appended to the output file as soon as it finishes, so an
+# interrupted run can be resumed with the same command: items already answered
+# without error are skipped. Items that failed are answered again and their new record
+# is appended after the old one, so an id can appear more than once in the output;
+# the last record for an id is the one that counts.
+#
+# Only transient failures (LLM or database errors that may pass) are retried within a
+# run. Failures that would repeat identically are recorded straight away: queries
+# rejected by admission control, unparseable generated queries, completions missing
+# from a replay cassette and a missing LLM configuration.
+
+# Errors that come out the same on every attempt
+_PERMANENT_ERRORS = re.compile(
+    r"^This question would scan|^Error parsing JSON query|No recorded completion|No LLM cassette|OPENAI_API_KEY|Unknown LLM_BACKEND"
+)
+
+
+def load_questions(path):
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            question = record.get("question") or record.get("query") or record.get("title") or record.get("body")
+            if question:
+                items.append({"id": str(record.get("id") or record.get("request_id") or number), "question": question})
+    return items
+
+
+# Ids whose last record in an earlier (possibly interrupted) run has no error
+def load_checkpoint(path):
+    failed = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted run
+                failed[record["id"]] = bool(record.get("error"))
+    except FileNotFoundError:
+        pass
+    return {item_id for item_id, error in failed.items() if not error}
+
+
+def is_transient(error):
+    return not _PERMANENT_ERRORS.search(error)
+
+
+def answer_item(item, db, limiter, retries, include_results):
+    start = time.perf_counter()
+    for attempt in range(1, retries + 2):
+        limiter.acquire()
+        # Interactive chat sessions get their completions first
+        with llm_scheduler.priority(llm_scheduler.BATCH):
+            turn = chatbot.answer_question(item["question"], db)
+        if not turn["error"] or not is_transient(turn["error"]) or attempt > retries:
+            break
+        # Exponential backoff with jitter before the next attempt
+        time.sleep(min(30, 2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+    record = {
+        "id": item["id"],
+        "question": item["question"],
+        "query": turn["query"],
+        "response": turn["content"],
+        "error": turn["error"],
+        "attempts": attempt,
+        "row_count": len(turn["results"]) if turn["results"] is not None else None,
+        "timings_ms": {span["name"]: span["durationMs"] for span in turn["trace"]},
+        "total_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    if include_results:
+        record["results"] = turn["results"]
+    return record
+
+
+def run_batch(items, output, workers=4, rate=2.0, retries=2, include_results=False, db=None):
+    db = db or data_backend.get_database()
+    limiter = TokenBucket(rate, capacity=max(1, workers))
+    write_lock = threading.Lock()
+    summary = {"answered": 0, "failed": 0}
+
+    def write(record):
+        with write_lock, open(output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+            summary["failed" if record["error"] else "answered"] += 1
+
+    # Keep at most 2x workers items in flight so huge inputs stay cheap to hold
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for item in items:
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+            pending.add(executor.submit(answer_item, item, db, limiter, retries, include_results))
+        for future in wait(pending).done:
+            write(future.result())
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the chatbot pipeline.")
+    parser.add_argument("input", help="JSONL file of questions")
+    parser.add_argument("--output", required=True, help="JSONL file answers are appended to (also the checkpoint)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="Questions started per second (default 2)")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per question after an error (default 2)")
+    parser.add_argument("--include-results", action="store_true", help="Also write the raw query results")
+    args = parser.parse_args(argv)
+
+    items = load_questions(args.input)
+    done = load_checkpoint(args.output)
+    todo = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} questions, {len(items) - len(todo)} already answered, {len(todo)} to go", file=sys.stderr)
+
+    start = time.perf_counter()
+    summary = run_batch(todo, args.output, args.workers, args.rate, args.retries, args.include_results)
+    print(f"Answered {summary['answered']}, failed {summary['failed']} in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
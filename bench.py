@@ -0,0 +1,373 @@
+import argparse
+import io
+import json
+import math
+import platform
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import matplotlib
+import pandas as pd
+matplotlib.use("Agg")  # Render word clouds without a display
+
+import data_backend
+import llm_backend
+
+# End-to-end benchmarks for chatbot turns and dashboard renders.
+#
+# Usage (offline and reproducible, once a cassette has been recorded with
+# LLM_BACKEND=record, e.g. by running the same command against the live API):
+#   DATA_BACKEND=local LLM_BACKEND=replay LLM_REPLAY_LATENCY=0 python bench.py --output bench.json
+#   python bench.py chatbot --corpus questions.jsonl --repeat 3
+#   python bench.py dashboard --scales 1 10 100 --baseline bench.json
+#   python bench.py loader --scales 1 100    # object vs Arrow-backed collection loading
+
+DEFAULT_SCALES = [1, 10, 100]
+
+
+# ------------------------------------- Instrumentation --------------------------------------------- #
+
+# Counts database round trips (one per find/aggregate/count call) made through the wrapper
+class CountingDatabase:
+    def __init__(self, database):
+        self.database = database
+        self.round_trips = 0
+
+    def __getitem__(self, name):
+        return CountingCollection(self, self.database[name])
+
+    def __getattr__(self, name):
+        return getattr(self.database, name)
+
+
+class CountingCollection:
+    COUNTED = {"find", "find_one", "aggregate", "count_documents", "estimated_document_count"}
+
+    def __init__(self, owner, collection):
+        self._owner = owner
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in self.COUNTED:
+            return attribute
+
+        def counted(*args, **kwargs):
+            self._owner.round_trips += 1
+            return attribute(*args, **kwargs)
+        return counted
+
+
+# Tallies LLM calls and token usage for whichever backend is configured
+class CountingLLM:
+    def __init__(self, backend):
+        self.backend = backend
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def complete(self, messages, model, max_tokens, temperature=None):
+        completion = self.backend.complete(messages, model, max_tokens, temperature)
+        self.calls += 1
+        self.prompt_tokens += completion.prompt_tokens
+        self.completion_tokens += completion.completion_tokens
+        return completion
+
+
+# High-water mark of the whole process so far, not of any one stage: it never goes
+# down, so it also covers every suite and scale that ran earlier in this process.
+# Reported once per suite (and per dashboard scale) as `process_peak_rss_mb`.
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+# Collects timings per stage plus any per-stage counters (round trips, tokens, ...)
+class StageRecorder:
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    def record(self, stage, seconds, **counters):
+        self.timings.setdefault(stage, []).append(seconds * 1000)
+        totals = self.counters.setdefault(stage, {})
+        for name, value in counters.items():
+            totals[name] = totals.get(name, 0) + value
+
+    def summary(self):
+        return {
+            stage: {
+                "count": len(timings),
+                "p50_ms": round(percentile(timings, 0.50), 3),
+                "p95_ms": round(percentile(timings, 0.95), 3),
+                "mean_ms": round(sum(timings) / len(timings), 3),
+                **self.counters.get(stage, {}),
+            }
+            for stage, timings in self.timings.items()
+        }
+
+
+# ------------------------------------- Chatbot benchmark --------------------------------------------- #
+
+# The worked examples embedded in the query-generation prompt
+def prompt_example_questions():
+    import chatbot
+    return re.findall(r'Example Question: "(.+?)"\n', chatbot.QUERY_PROMPT)
+
+
+# Questions from a JSONL log; each line holds a "question" (or "query"/"title") field
+def load_corpus(path):
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                question = record.get("question") or record.get("query") or record.get("title")
+                if question:
+                    questions.append(question)
+    return questions
+
+
+def bench_chatbot(database, questions, repeat=1):
+    import chatbot
+
+    db = CountingDatabase(database)
+    llm = CountingLLM(llm_backend.get_llm())
+    llm_backend.set_llm(llm)
+    recorder = StageRecorder()
+    errors = 0
+
+    def run_stage(stage, func, *args):
+        llm.reset()
+        db.round_trips = 0
+        start = time.perf_counter()
+        result = func(*args)
+        recorder.record(
+            stage, time.perf_counter() - start,
+            round_trips=db.round_trips, llm_calls=llm.calls,
+            prompt_tokens=llm.prompt_tokens, completion_tokens=llm.completion_tokens,
+        )
+        return result
+
+    try:
+        for _ in range(repeat):
+            for question in questions:
+                start = time.perf_counter()
+                query_data = run_stage("generate_query", chatbot.generate_query, question)
+                if "error" in query_data:
+                    errors += 1
+                    continue
+                results = run_stage("execute_query", chatbot.execute_query, query_data, db)
+                if isinstance(results, dict) and "error" in results:
+                    errors += 1
+                    continue
+                run_stage("generate_response", chatbot.generate_response, results, question)
+                recorder.record("turn", time.perf_counter() - start)
+    finally:
+        llm_backend.set_llm(llm.backend)
+
+    return {"questions": len(questions), "repeat": repeat, "errors": errors, "stages": recorder.summary(),
+            "process_peak_rss_mb": peak_rss_mb()}
+
+
+# ------------------------------------- Dashboard benchmark --------------------------------------------- #
+
+# Copy every collection `scale` times; team member names get a suffix so per-person
+# aggregates grow with the data instead of collapsing onto the original people.
+def scaled_database(database, scale):
+    data = {}
+    for name in data_backend.COLLECTIONS:
+        documents = [{k: v for k, v in doc.items() if k != "_id"} for doc in database[name].find()]
+        copies = []
+        for i in range(scale):
+            for doc in documents:
+                doc = dict(doc)
+                if i and name == "teams" and "name" in doc:
+                    doc["name"] = f"{doc['name']} ({i})"
+                copies.append(doc)
+        data[name] = copies
+    return data_backend.LocalDatabase(data)
+
+
+def bench_dashboard(database, scales=DEFAULT_SCALES, repeat=1):
+    import dashboard
+
+    results = {}
+    for scale in scales:
+        db = CountingDatabase(scaled_database(database, scale))
+        recorder = StageRecorder()
+        firm_options = dashboard.get_firm_options(dashboard.prepare_dashboard_data(db))
+
+        for _ in range(repeat):
+            for firm in firm_options:
+                render_start = time.perf_counter()
+
+                db.round_trips = 0
+                start = time.perf_counter()
+                data = dashboard.prepare_dashboard_data(db)
+                recorder.record("prepare", time.perf_counter() - start, round_trips=db.round_trips)
+
+                start = time.perf_counter()
+                figures = dashboard.build_dashboard_figures(data, firm)
+                recorder.record("figures", time.perf_counter() - start)
+
+                start = time.perf_counter()
+                wordcloud_fig = dashboard.build_wordcloud_figure(data)
+                recorder.record("wordcloud", time.perf_counter() - start)
+
+                start = time.perf_counter()
+                table = dashboard.build_practice_table(data)
+                recorder.record("practice_table", time.perf_counter() - start)
+
+                # What Streamlit pays to ship the page: Plotly JSON, the PNG and the table
+                start = time.perf_counter()
+                payload = sum(len(fig.to_json()) for fig in figures.values())
+                buffer = io.BytesIO()
+                wordcloud_fig.savefig(buffer, format="png")
+                payload += buffer.tell() + len(table.to_json())
+                matplotlib.pyplot.close(wordcloud_fig)
+                recorder.record("serialize", time.perf_counter() - start, payload_bytes=payload)
+
+                recorder.record("render", time.perf_counter() - render_start)
+
+        results[f"{scale}x"] = {"firms": len(firm_options), "stages": recorder.summary(),
+                                "process_peak_rss_mb": peak_rss_mb()}
+    return results
+
+
+# ------------------------------------- Loader benchmark --------------------------------------------- #
+
+# Load one collection with `load` and report wall time plus peak memory: the Python
+# heap (tracemalloc, which also sees numpy buffers) and the Arrow buffers of the result
+# (allocated outside tracemalloc's view). Memory is measured in a second, untimed pass
+# because tracing slows allocation down.
+def measure_load(load, name, db):
+    start = time.perf_counter()
+    load(name, db)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    frame = load(name, db)
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    arrow_bytes = sum(frame[column].array.nbytes for column in frame
+                      if isinstance(frame[column].dtype, pd.ArrowDtype))
+    return seconds, round((python_peak + arrow_bytes) / (1024 * 1024), 3)
+
+
+# Current object-column loader vs the Arrow-backed one, per collection. Scale 1 reads the
+# configured database itself (real Mongo when DATA_BACKEND=mongo); larger scales read
+# local copies.
+def bench_loader(database, scales=DEFAULT_SCALES, repeat=1):
+    import arrow_loader
+    import dashboard
+
+    loaders = {
+        "python": lambda name, db: dashboard.fetch_collection_as_df(name, db, loader="python"),
+        "arrow": arrow_loader.fetch_collection_as_arrow_df,
+    }
+    results = {}
+    for scale in scales:
+        db = database if scale == 1 else scaled_database(database, scale)
+        recorder = StageRecorder()
+        for _ in range(repeat):
+            for name in data_backend.COLLECTIONS:
+                for loader, load in loaders.items():
+                    seconds, peak_mb = measure_load(load, name, db)
+                    recorder.record(f"{loader}:{name}", seconds, peak_mb=peak_mb)
+        stages = recorder.summary()
+        # Peak memory is summed over repeats by the recorder; report it per load
+        for stats in stages.values():
+            stats["peak_mb"] = round(stats["peak_mb"] / stats["count"], 3)
+        results[f"{scale}x"] = {"stages": stages}
+    return results
+
+
+# ------------------------------------- Reporting --------------------------------------------- #
+
+# Compare p50/p95 of every stage with a previous run; returns the regressions found
+def compare(results, baseline, threshold):
+    regressions = []
+
+    def walk(current, previous, path):
+        for key, value in current.items():
+            if key not in previous:
+                continue
+            if isinstance(value, dict):
+                walk(value, previous[key], path + [key])
+            elif key in ("p50_ms", "p95_ms") and previous[key]:
+                change = (value - previous[key]) / previous[key]
+                label = "/".join(path + [key])
+                print(f"{label:70s} {previous[key]:10.2f} -> {value:10.2f} ms ({change:+.1%})")
+                if change > threshold:
+                    regressions.append(label)
+
+    walk(results, baseline, [])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark chatbot turns and dashboard renders.")
+    parser.add_argument("suite", nargs="?", choices=["all", "chatbot", "dashboard", "loader"], default="all")
+    parser.add_argument("--corpus", action="append", default=[],
+                        help="JSONL file of questions (repeatable); defaults to the prompt's examples")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Fail when a p50/p95 grows by more than this fraction (default 0.2)")
+    args = parser.parse_args(argv)
+
+    database = data_backend.get_database()
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        }
+    }
+
+    if args.suite in ("all", "chatbot"):
+        questions = [q for path in args.corpus for q in load_corpus(path)] or prompt_example_questions()
+        results["chatbot"] = bench_chatbot(database, questions, args.repeat)
+    if args.suite in ("all", "dashboard"):
+        results["dashboard"] = bench_dashboard(database, args.scales, args.repeat)
+    if args.suite in ("all", "loader"):
+        results["loader"] = bench_loader(database, args.scales, args.repeat)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare({k: v for k, v in results.items() if k != "meta"}, baseline, args.max_regression)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed by more than {args.max_regression:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent chat history (SQLite at CHAT_DB_PATH) and the bounded conversation
+# context handed to generate_query for follow-up questions.
+
+DEFAULT_DB_PATH = "chat_history.sqlite3"
+
+# Token budget for the conversation context sent with each question
+CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "600"))
+# Most recent messages considered when building that context
+CONTEXT_MESSAGES = 20
+# Characters of an assistant answer kept verbatim in the context
+ANSWER_EXCERPT_CHARS = 300
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChatStore(os.getenv("CHAT_DB_PATH", DEFAULT_DB_PATH))
+        return _store
+
+
+class ChatStore:
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    error TEXT,
+                    trace TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, id)")
+
+    def append(self, session_id, message):
+        trace = message.get("trace")
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO messages (session_id, role, content, error, trace, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, message["role"], message["content"], message.get("error"),
+                 json.dumps(trace) if trace else None, time.time()),
+            )
+
+    def count(self, session_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0]
+
+    # The newest `limit` messages of a session, oldest first
+    def recent(self, session_id, limit):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT role, content, error, trace FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+        return [
+            {"role": role, "content": content, "error": error, "trace": json.loads(trace) if trace else None}
+            for role, content, error, trace in reversed(rows)
+        ]
+
+    def clear(self, session_id):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+
+# Rough token count (~4 characters per token for English text)
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def _shorten(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+# Conversation context for the next question: the newest turns verbatim (answers
+# shortened) while they fit in `max_tokens`, and a one-line summary of the questions
+# asked before that. Failed turns are skipped. Returns "" for a new conversation.
+def build_context(messages, max_tokens=CONTEXT_TOKENS):
+    turns = []
+    for message in messages:
+        if message["role"] == "user":
+            turns.append({"question": message["content"], "answer": None})
+        elif turns and turns[-1]["answer"] is None and not message.get("error"):
+            turns[-1]["answer"] = message["content"]
+    turns = [turn for turn in turns if turn["answer"]]
+    if not turns:
+        return ""
+
+    # Keep a quarter of the budget for the summary of older turns
+    budget = max_tokens - max_tokens // 4
+    recent = []
+    while turns:
+        turn = turns[-1]
+        lines = [f"User: {_shorten(turn['question'], ANSWER_EXCERPT_CHARS)}",
+                 f"Assistant: {_shorten(turn['answer'], ANSWER_EXCERPT_CHARS)}"]
+        cost = estimate_tokens("\n".join(lines))
+        if cost > budget and recent:
+            break
+        recent[:0] = lines
+        budget -= cost
+        turns.pop()
+
+    # Older turns, newest first, as far as the summary budget (in characters) allows
+    earlier, remaining = [], (max_tokens // 4) * 4
+    for turn in reversed(turns):
+        question = _shorten(turn["question"], 120)
+        remaining -= len(question) + 2
+        if remaining < 0:
+            break
+        earlier.append(question)
+
+    summary = ["Earlier the user asked: " + "; ".join(earlier)] if earlier else []
+    return "\n".join(summary + recent)
@@ -1,33 +1,39 @@
 
 
 import streamlit as st
-from pymongo import MongoClient
 import os
 import json
+import urllib.request
 from dotenv import load_dotenv
-from openai import OpenAI
+import data_backend
+import llm_backend
+import tracing
+import uuid
+import chat_history
+import query_admission
+import views
+import response_router
 
 # Load environment variables from .env file
 load_dotenv()
 
-# MongoDB setup
-mongo_url = "MONGODB URL HERE"
-mongo_client = MongoClient(mongo_url)
-database = mongo_client["RAG"]
+# Data setup (shared with app.py, see data_backend.py)
+database = data_backend.get_database()
 
-# OpenAI client setup
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY environment variable is not set.")
-client = OpenAI(api_key=api_key)
+# LLM setup happens lazily (LLM_BACKEND=openai|record|replay, see llm_backend.py)
 
 
-def generate_query(user_query):
-    prompt = """
+# Instructions and worked examples sent ahead of every question in generate_query
+QUERY_PROMPT = """
     You are a data analyst generating MongoDB queries based on the provided schema and conversation history.
-    Only use data from the schema and ensure queries are based solely on the `teams`, `careers`, `articles`, and `practices` collections, ignoring any unrelated or external context.
+    Only use data from the schema and ensure queries are based solely on the `teams`, `careers`, `articles`, `practices`, and `practice_members` collections, ignoring any unrelated or external context.
     Absolutely **do not reference any generic, historical, or publicly known figures or data**—only refer to data that exists in these collections.
 
+    `practice_members` is a precomputed join with one document per member of each practice, with the fields
+    `firm`, `practice`, `practice_area`, `specializations`, `name`, `is_leader`, `position`, `email`, `phone`,
+    `education`, `admissions`, and `firm_open_positions` (open roles at the member's firm). Use it for any question
+    that needs people together with their practice area.
+
     ### Example Queries
 
     Example Question: "Who are founding partners for Rupp Pfalzgraf?"
@@ -352,14 +358,14 @@ def generate_query(user_query):
     Example Question: "Show all team members in the Immigration Law practice."
     Expected MongoDB Query:
     {
-      "collection": "practices",
+      "collection": "practice_members",
       "query": {
-        "title": "Immigration Law"
+        "practice_area": "Immigration Law"
       },
       "projection": {
-        "team members": 1,
+        "name": 1,
+        "position": 1,
         "firm": 1,
-        "title": 1,
         "_id": 0
       }
     }
@@ -401,22 +407,67 @@ def generate_query(user_query):
     Example Question: "List all members who work in Environmental Law."
     Expected MongoDB Query:
     {
-      "collection": "practices",
+      "collection": "practice_members",
       "query": {
-        "title": "Environmental Law"
+        "practice_area": "Environmental Law"
       },
       "projection": {
-        "team members": 1,
+        "name": 1,
         "firm": 1,
         "_id": 0
       }
     }
 
-    Question: """ + json.dumps(user_query) + """
+    Example Question: "What are the email addresses of the partners in the Business Law practice?"
+    Expected MongoDB Query:
+    {
+      "collection": "practice_members",
+      "query": {
+        "practice_area": "Business Law",
+        "position": { "$regex": "Partner", "$options": "i" }
+      },
+      "projection": {
+        "name": 1,
+        "email": 1,
+        "firm": 1,
+        "_id": 0
+      }
+    }
+
+    """
+
+
+# Number of conversation turns rendered at once; older ones are paged in on demand
+RENDER_TURNS = int(os.getenv("CHAT_RENDER_TURNS", "10"))
+
+
+# The worked example queries in QUERY_PROMPT, in order (warm-up pre-plans their shapes)
+def prompt_example_queries():
+    decoder = json.JSONDecoder()
+    queries = []
+    position = QUERY_PROMPT.find("Expected MongoDB Query:")
+    while position != -1:
+        start = QUERY_PROMPT.index("{", position)
+        try:
+            query, _ = decoder.raw_decode(QUERY_PROMPT, start)
+            queries.append(query)
+        except ValueError:
+            pass
+        position = QUERY_PROMPT.find("Expected MongoDB Query:", start)
+    return queries
+
+
+# `history` is the bounded conversation context from chat_history.build_context
+def generate_query(user_query, history=""):
+    prompt = QUERY_PROMPT
+    if history:
+        prompt += "### Conversation History (use it to resolve follow-up questions)\n    " + \
+            history.replace("\n", "\n    ") + "\n\n    "
+    prompt += "Question: " + json.dumps(user_query) + """
     Output only the MongoDB query as JSON:
     """
     try:
-        response = client.chat.completions.create(
+        completion = llm_backend.get_llm().complete(
             messages=[
                 {"role": "system",
                  "content": "You are an assistant that generates MongoDB queries based on user questions and capable of handling general questions."},
@@ -426,92 +477,252 @@ def generate_query(user_query):
             max_tokens=200,
             temperature=0,
         )
-        generated_query = response.choices[0].message.content.strip()
+        tracing.set_attributes(
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+            cache_hit=completion.cached,
+        )
+        generated_query = completion.text.strip()
         return json.loads(generated_query)
     except json.JSONDecodeError as json_err:
+        tracing.record_error(json_err)
         return {"error": f"Error parsing JSON query: {json_err}"}
     except Exception as e:
+        tracing.record_error(e)
         return {"error": f"Error generating query: {e}"}
 
 
-def execute_query(query_data, db):
+# A generated aggregation sometimes carries its filter in "query" instead of a $match
+# stage; put it where the pipeline applies it
+def _attach_filter(query_data):
+    aggregation = query_data.get("aggregation")
+    if aggregation and query_data.get("query") and not any("$match" in stage for stage in aggregation):
+        query_data = dict(query_data, aggregation=[{"$match": query_data["query"]}] + list(aggregation))
+    return query_data
+
+
+# Returns (results, notice): notice says when admission capped the query and the
+# results may be incomplete, else None. Errors come back as ({"error": ...}, None).
+def run_query(query_data, db):
     try:
-        collection = db[query_data["collection"]]
+        query_data = _attach_filter(query_data)
+        # Cost check before anything runs (see query_admission.py)
+        with tracing.span("admit_query") as admission_span:
+            query_data, decision = query_admission.admit_query(query_data, db)
+            admission_span.set_attributes(
+                action=decision["action"], plan=decision["plan"],
+                scanned_docs=decision["scanned_docs"], cache_hit=decision["cache_hit"],
+            )
+        if decision["action"] == "reject":
+            return {"error": query_admission.rejection_message(query_data, decision)}, None
+
+        if query_data["collection"] == views.VIEW_NAME:
+            # Read-only: falls back to an in-memory join until the view is built (see views.py)
+            collection = views.view_collection(db)
+        else:
+            collection = db[query_data["collection"]]
         query = query_data.get("query", {})
         projection = query_data.get("projection")
         aggregation = query_data.get("aggregation")
+        limit = query_data.get("limit", 0)
         if aggregation:
             result = list(collection.aggregate(aggregation))
         elif projection:
-            result = list(collection.find(query, projection))
+            result = list(collection.find(query, projection, limit=limit))
         else:
-            result = list(collection.find(query))
-        return result
+            result = list(collection.find(query, limit=limit))
+        notice = query_admission.limit_notice(decision, len(result))
+        tracing.set_attributes(collection=query_data["collection"], row_count=len(result), truncated=bool(notice))
+        return result, notice
     except Exception as e:
-        return {"error": str(e)}
+        tracing.record_error(e)
+        return {"error": str(e)}, None
 
 
-def generate_response(results, question):
+def execute_query(query_data, db):
+    return run_query(query_data, db)[0]
+
+
+# Simple results are rendered without an LLM; the rest go to a model sized for the
+# task (see response_router.py)
+def generate_response(results, question, query_data=None):
     try:
-        prompt = f"Based on the following data: {json.dumps(results)}, answer the question: '{question}'"
-        response = client.chat.completions.create(
+        serialized_results = json.dumps(results)
+        tracing.set_attributes(result_bytes=len(serialized_results.encode("utf-8")))
+        tier, text = response_router.route(results, question, query_data)
+        tracing.set_attributes(response_tier=tier)
+        if text is not None:
+            return text
+        prompt = f"Based on the following data: {serialized_results}, answer the question: '{question}'"
+        completion = llm_backend.get_llm().complete(
             messages=[
                 {"role": "system",
                  "content": "You are a helpful assistant that answers user questions based on the provided data."},
                 {"role": "user", "content": prompt}
             ],
-            model="gpt-4",
+            model=response_router.model_for(tier),
             max_tokens=150
         )
-        return response.choices[0].message.content.strip()
+        tracing.set_attributes(
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+            cache_hit=completion.cached,
+        )
+        return completion.text.strip()
     except Exception as e:
+        tracing.record_error(e)
         return f"Error generating response: {str(e)}"
 
 
+# Run one question through the query -> execute -> response pipeline, tracing each stage.
+# Yields progress events as stages finish ({"event": "query"}, {"event": "results"})
+# and finally {"event": "done", "turn": turn} with the structured turn; `error` is set
+# when a stage failed and `content` holds the text shown to the user either way.
+def iter_answer(question, db, history=""):
+    turn = {"question": question, "query": None, "results": None, "notice": None, "error": None}
+    with tracing.start_trace("chat_turn", question=question) as trace:
+        with tracing.span("generate_query", history_tokens=chat_history.estimate_tokens(history) if history else 0):
+            query_data = generate_query(question, history)
+
+        if "error" in query_data:
+            turn["error"] = query_data["error"]
+        else:
+            turn["query"] = query_data
+            yield {"event": "query", "query": query_data}
+            with tracing.span("execute_query"):
+                results, notice = run_query(query_data, db)
+            if isinstance(results, dict) and "error" in results:
+                turn["error"] = results["error"]
+            else:
+                turn["results"] = results
+                turn["notice"] = notice
+                yield {"event": "results", "row_count": len(results)}
+                with tracing.span("generate_response") as response_span:
+                    turn["content"] = generate_response(results, question, query_data)
+                if notice:
+                    turn["content"] += f"\n\n_{notice}_"
+                if response_span.error:
+                    turn["error"] = response_span.error
+
+        if turn["error"]:
+            trace.root.set_error(turn["error"])
+    turn.setdefault("content", f"Error: {turn['error']}")
+    turn["trace"] = trace.to_dicts()
+    yield {"event": "done", "turn": turn}
+
+
+def answer_question(question, db, history=""):
+    for event in iter_answer(question, db, history):
+        pass
+    return event["turn"]
+
+
+# Same as answer_question, but served by the chatbot HTTP API at CHATBOT_API_URL (see api.py)
+def answer_question_remote(question, history=""):
+    request = urllib.request.Request(
+        os.environ["CHATBOT_API_URL"].rstrip("/") + "/chat",
+        data=json.dumps({"question": question, "history": history}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return json.load(response)
+    except Exception as e:
+        error = f"Error calling chatbot API: {e}"
+        return {"question": question, "query": None, "results": None, "notice": None, "error": error,
+                "content": f"Error: {error}", "trace": []}
+
+
+# Per-stage rows for the "Debug timings" expander
+def trace_summary(spans):
+    rows = []
+    for span in spans:
+        attributes = span["attributes"]
+        rows.append({
+            "stage": span["name"],
+            "ms": span["durationMs"],
+            "prompt tokens": attributes.get("prompt_tokens"),
+            "completion tokens": attributes.get("completion_tokens"),
+            "rows": attributes.get("row_count"),
+            "prompt bytes": attributes.get("result_bytes"),
+            "cache hit": attributes.get("cache_hit"),
+            "tier": attributes.get("response_tier"),
+            "status": span["status"]["code"],
+        })
+    return rows
+
+
+def render_debug_timings(spans):
+    with st.expander("Debug timings"):
+        st.dataframe(trace_summary(spans), use_container_width=True, hide_index=True)
+
+
+# Chat session id, kept in the URL so a reload resumes the same persisted conversation
+def get_session_id():
+    if "chat" not in st.query_params:
+        st.query_params["chat"] = uuid.uuid4().hex
+    return st.query_params["chat"]
+
+
+def render_message(chat):
+    with st.chat_message(chat["role"]):
+        if chat.get("error") and chat["content"].startswith("Error: "):
+            st.markdown(f"**Error:** {chat['error']}")
+        else:
+            st.markdown(chat["content"])
+        if chat.get("trace"):
+            render_debug_timings(chat["trace"])
+
+
 # Main Chatbot Page Logic
 def chatbot_page(database):
     st.title("Chatbot: Data Visionaries")
 
-    # Initialize chat history
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+    store = chat_history.get_store()
+    session_id = get_session_id()
+
+    # Only the most recent turns are rendered; older ones are paged in on demand
+    if "chat_visible_turns" not in st.session_state:
+        st.session_state.chat_visible_turns = RENDER_TURNS
+
+    total_messages = store.count(session_id)
+    visible = store.recent(session_id, st.session_state.chat_visible_turns * 2)
+
+    col1, col2 = st.columns([8.5, 1.5])
+    with col1:
+        hidden = total_messages - len(visible)
+        if hidden > 0 and st.button(f"Show earlier messages ({hidden} more)"):
+            st.session_state.chat_visible_turns += RENDER_TURNS
+            st.rerun()
+    with col2:
+        if total_messages and st.button("New conversation"):
+            st.query_params["chat"] = uuid.uuid4().hex
+            st.session_state.chat_visible_turns = RENDER_TURNS
+            st.rerun()
 
     # Display chat history
-    for chat in st.session_state.chat_history:
-        if chat["role"] == "user":
-            with st.chat_message("user"):
-                st.markdown(chat["content"])
-        else:
-            with st.chat_message("assistant"):
-                st.markdown(chat["content"])
+    for chat in visible:
+        render_message(chat)
 
     # Capture user input
     user_input = st.chat_input("Type your question here...")
     if user_input:
+        # Context for follow-up questions, built before this question is stored
+        history = chat_history.build_context(store.recent(session_id, chat_history.CONTEXT_MESSAGES))
+
         # Add user message to chat history
-        st.session_state.chat_history.append({"role": "user", "content": user_input})
+        store.append(session_id, {"role": "user", "content": user_input})
 
         # Display user's input
         with st.chat_message("user"):
             st.markdown(user_input)
 
-        # Generate MongoDB query
-        query_data = generate_query(user_input)
-
-        if "error" in query_data:
-            # Display error
-            with st.chat_message("assistant"):
-                st.markdown(f"**Error:** {query_data['error']}")
-            st.session_state.chat_history.append({"role": "assistant", "content": f"Error: {query_data['error']}"})
+        # Generate MongoDB query, execute it and generate the response
+        if os.getenv("CHATBOT_API_URL"):
+            turn = answer_question_remote(user_input, history)
         else:
-            # Execute query and generate response
-            results = execute_query(query_data, database)
-            if isinstance(results, dict) and "error" in results:
-                with st.chat_message("assistant"):
-                    st.markdown(f"**Error:** {results['error']}")
-                st.session_state.chat_history.append({"role": "assistant", "content": f"Error: {results['error']}"})
-            else:
-                response = generate_response(results, user_input)
-                with st.chat_message("assistant"):
-                    st.markdown(response)
-                st.session_state.chat_history.append({"role": "assistant", "content": response})
+            turn = answer_question(user_input, database, history)
+
+        message = {"role": "assistant", "content": turn["content"], "error": turn["error"], "trace": turn["trace"]}
+        render_message(message)
+        store.append(session_id, message)
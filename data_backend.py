@@ -0,0 +1,520 @@
+import copy
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Every entry point (app, chatbot, export_static, snapshot_store, views, the mirror
+# CLI below) imports this module, so .env is read here before any setting is used
+load_dotenv()
+
+# Names of the collections the app reads from the `RAG` database
+COLLECTIONS = ["articles", "careers", "teams", "practices"]
+
+DATABASE_NAME = "RAG"
+
+# Small synthetic fixture shipped with the repo so the app runs without a cluster
+DEFAULT_FIXTURE = str(Path(__file__).with_name("fixtures") / "sample.json")
+
+_database = None
+
+
+# Return the process-wide database handle, creating it on first use.
+# DATA_BACKEND selects the implementation:
+#   mongo     - live MongoDB cluster at MONGODB_URL (default)
+#   local     - in-memory engine loaded from the fixture at LOCAL_DATA_PATH
+#   mongomock - mongomock client seeded from the same fixture (needs the development
+#               requirements: pip install -r requirements-dev.txt)
+def get_database():
+    global _database
+    if _database is None:
+        _database = open_database(os.getenv("DATA_BACKEND", "mongo"))
+    return _database
+
+
+def open_database(backend="mongo"):
+    backend = backend.lower()
+    if backend == "mongo":
+        from pymongo import MongoClient
+        mongo_url = os.getenv("MONGODB_URL", "MONGODB URL HERE")
+        return MongoClient(mongo_url)[DATABASE_NAME]
+    if backend == "local":
+        return LocalDatabase(load_fixture(os.getenv("LOCAL_DATA_PATH", DEFAULT_FIXTURE)))
+    if backend == "mongomock":
+        import mongomock
+        database = mongomock.MongoClient()[DATABASE_NAME]
+        for name, documents in load_fixture(os.getenv("LOCAL_DATA_PATH", DEFAULT_FIXTURE)).items():
+            if documents:
+                database[name].insert_many(documents)
+        return database
+    raise ValueError(f"Unknown DATA_BACKEND '{backend}'. Use 'mongo', 'local' or 'mongomock'.")
+
+
+# ------------------------------------- Fixtures --------------------------------------------- #
+
+# Load the collections from either a single JSON file ({"teams": [...], ...}) or a
+# directory holding one <collection>.json / .jsonl / .parquet file per collection.
+def load_fixture(path):
+    path = Path(path)
+    if path.is_file():
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return {name: list(data.get(name, [])) for name in set(COLLECTIONS) | set(data)}
+
+    if not path.is_dir():
+        raise FileNotFoundError(f"Local data fixture '{path}' does not exist.")
+
+    data = {}
+    for file in sorted(path.iterdir()):
+        name, suffix = file.stem, file.suffix.lower()
+        if suffix == ".json":
+            with open(file, encoding="utf-8") as f:
+                data[name] = json.load(f)
+        elif suffix == ".jsonl":
+            with open(file, encoding="utf-8") as f:
+                data[name] = [json.loads(line) for line in f if line.strip()]
+        elif suffix == ".parquet":
+            import pandas as pd
+            records = pd.read_parquet(file).to_dict("records")
+            data[name] = [{k: _from_parquet_value(v) for k, v in record.items()} for record in records]
+    for name in COLLECTIONS:
+        data.setdefault(name, [])
+    return data
+
+
+def _from_parquet_value(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+# Write every collection of `database` to `path` as <collection>.json so the app can
+# later run against it with DATA_BACKEND=local.
+def mirror_database(database, path, collections=COLLECTIONS):
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name in collections:
+        documents = list(database[name].find())
+        with open(path / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(documents, f, default=str, ensure_ascii=False, indent=1)
+
+
+# ------------------------------------- Local backend --------------------------------------------- #
+
+class LocalDatabase:
+    def __init__(self, data):
+        self._collections = {name: LocalCollection(name, documents) for name, documents in data.items()}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = LocalCollection(name, [])
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+    # Only `explain` is supported; the local engine always scans the whole collection
+    def command(self, name, spec=None, **kwargs):
+        if name != "explain":
+            raise ValueError(f"Unsupported command '{name}' in local backend")
+        return {"queryPlanner": {"namespace": next(iter(spec.values())), "winningPlan": {"stage": "COLLSCAN"}}}
+
+
+class LocalCursor:
+    def __init__(self, documents):
+        self._documents = documents
+
+    def sort(self, key, direction=1):
+        keys = [(key, direction)] if isinstance(key, str) else list(key)
+        self._documents = _sort_documents(self._documents, dict(keys))
+        return self
+
+    def skip(self, count):
+        self._documents = self._documents[count:]
+        return self
+
+    def limit(self, count):
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        return (copy.deepcopy(doc) for doc in self._documents)
+
+
+class LocalCollection:
+    def __init__(self, name, documents):
+        self.name = name
+        self._documents = [dict(doc) for doc in documents]
+        for index, doc in enumerate(self._documents):
+            doc.setdefault("_id", f"{name}-{index}")
+
+    def find(self, filter=None, projection=None, limit=0, skip=0, sort=None):
+        documents = [doc for doc in self._documents if _matches(doc, filter or {})]
+        if projection:
+            documents = [_project(doc, projection) for doc in documents]
+        cursor = LocalCursor(documents)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        for doc in self.find(filter, projection, limit=1, sort=sort):
+            return doc
+        return None
+
+    def aggregate(self, pipeline):
+        documents = copy.deepcopy(self._documents)
+        for stage in pipeline:
+            if len(stage) != 1:
+                raise ValueError(f"Aggregation stage must have exactly one operator: {stage}")
+            (operator, spec), = stage.items()
+            if operator not in _STAGES:
+                raise ValueError(f"Unsupported aggregation stage '{operator}' in local backend")
+            documents = _STAGES[operator](documents, spec)
+        return iter(documents)
+
+    def count_documents(self, filter=None):
+        return sum(1 for doc in self._documents if _matches(doc, filter or {}))
+
+    def estimated_document_count(self):
+        return len(self._documents)
+
+    # Minimal write support, enough for derived collections such as the views in views.py
+    def insert_many(self, documents):
+        for doc in documents:
+            doc = copy.deepcopy(doc)
+            doc.setdefault("_id", f"{self.name}-{len(self._documents)}")
+            self._documents.append(doc)
+
+    def replace_one(self, filter, replacement, upsert=False):
+        replacement = copy.deepcopy(replacement)
+        for index, doc in enumerate(self._documents):
+            if _matches(doc, filter):
+                replacement.setdefault("_id", doc["_id"])
+                self._documents[index] = replacement
+                return
+        if upsert:
+            self.insert_many([{**{k: v for k, v in filter.items() if not k.startswith("$")}, **replacement}])
+
+    def delete_many(self, filter):
+        self._documents = [doc for doc in self._documents if not _matches(doc, filter)]
+
+    # Every local query is a full scan, so indexes are accepted and ignored
+    def create_index(self, keys, **kwargs):
+        return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+# ------------------------------------- Query matching --------------------------------------------- #
+
+_MISSING = object()
+
+
+def _get_path(doc, path):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list) and part.isdigit():
+            value = value[int(part)] if int(part) < len(value) else _MISSING
+        elif isinstance(value, list):
+            values = [item.get(part, _MISSING) for item in value if isinstance(item, dict)]
+            value = [v for v in values if v is not _MISSING] or _MISSING
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _compile_regex(pattern, options=""):
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags = 0
+    for option in options or "":
+        flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}.get(option, 0)
+    return re.compile(pattern, flags)
+
+
+def _candidates(value):
+    # Mongo compares against the array itself and against each of its elements
+    if isinstance(value, list):
+        return [value] + value
+    return [value]
+
+
+def _compare(a, b, op):
+    try:
+        return op(a, b)
+    except TypeError:
+        return False
+
+
+_COMPARISONS = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+
+def _matches_condition(value, condition):
+    if isinstance(condition, re.Pattern):
+        return any(isinstance(v, str) and condition.search(v) for v in _candidates(value))
+    if not (isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition)):
+        if value is _MISSING:
+            return condition is None
+        return any(v == condition for v in _candidates(value))
+
+    for operator, operand in condition.items():
+        if operator == "$options":
+            continue
+        if operator == "$regex":
+            pattern = _compile_regex(operand, condition.get("$options", ""))
+            if not any(isinstance(v, str) and pattern.search(v) for v in _candidates(value)):
+                return False
+        elif operator == "$eq":
+            if not any(v == operand for v in _candidates(value)):
+                return False
+        elif operator == "$ne":
+            if _matches_condition(value, operand):
+                return False
+        elif operator in _COMPARISONS:
+            if value is _MISSING or not any(_compare(v, operand, _COMPARISONS[operator]) for v in _candidates(value)):
+                return False
+        elif operator == "$in":
+            if not any(_matches_condition(value, item) for item in operand):
+                return False
+        elif operator == "$nin":
+            if any(_matches_condition(value, item) for item in operand):
+                return False
+        elif operator == "$exists":
+            if (value is not _MISSING) != bool(operand):
+                return False
+        elif operator == "$not":
+            if _matches_condition(value, operand):
+                return False
+        elif operator == "$size":
+            if not (isinstance(value, list) and len(value) == operand):
+                return False
+        elif operator == "$all":
+            if not (isinstance(value, list) and all(_matches_condition(value, item) for item in operand)):
+                return False
+        elif operator == "$elemMatch":
+            if not isinstance(value, list):
+                return False
+            if not any(_matches_element(item, operand) for item in value):
+                return False
+        else:
+            raise ValueError(f"Unsupported query operator '{operator}' in local backend")
+    return True
+
+
+def _matches_element(item, condition):
+    if isinstance(item, dict) and not all(k.startswith("$") for k in condition):
+        return _matches(item, condition)
+    return _matches_condition(item, condition)
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(_matches(doc, sub) for sub in condition):
+                return False
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported top-level query operator '{key}' in local backend")
+        elif not _matches_condition(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+# ------------------------------------- Projection and expressions --------------------------------------------- #
+
+def _evaluate(expression, doc):
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get_path(doc, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, list):
+        return [_evaluate(item, doc) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) == 1:
+        (operator, operand), = expression.items()
+        if operator.startswith("$"):
+            if operator == "$literal":
+                return operand
+            args = _evaluate(operand, doc)
+            if operator == "$size":
+                return len(args or [])
+            if operator == "$toUpper":
+                return str(args or "").upper()
+            if operator == "$toLower":
+                return str(args or "").lower()
+            if operator == "$concat":
+                return None if any(a is None for a in args) else "".join(args)
+            if operator == "$ifNull":
+                return next((a for a in args if a is not None), None)
+            if operator in ("$sum", "$max", "$min", "$avg") and isinstance(args, list):
+                return _ACCUMULATORS[operator]([v for v in args if v is not None])
+            raise ValueError(f"Unsupported expression operator '{operator}' in local backend")
+    return {key: _evaluate(value, doc) for key, value in expression.items()}
+
+
+def _project(doc, projection):
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    include_id = projection.get("_id", 1) not in (0, False)
+    inclusive = any(v not in (0, False) for v in fields.values()) or (not fields and include_id)
+
+    if inclusive:
+        result = {}
+        if include_id and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for key, spec in fields.items():
+            if spec in (1, True):
+                value = _get_path(doc, key)
+                if value is not _MISSING:
+                    result[key] = value
+            else:
+                result[key] = _evaluate(spec, doc)
+        return result
+
+    result = {k: v for k, v in doc.items() if k not in fields}
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+
+# ------------------------------------- Aggregation stages --------------------------------------------- #
+
+def _sum(values):
+    return sum(v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool))
+
+
+def _avg(values):
+    numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    return sum(numbers) / len(numbers) if numbers else None
+
+
+def _unique(values):
+    seen = []
+    for value in values:
+        if value not in seen:
+            seen.append(value)
+    return seen
+
+
+_ACCUMULATORS = {
+    "$sum": _sum,
+    "$avg": _avg,
+    "$min": lambda values: min((v for v in values if v is not None), default=None),
+    "$max": lambda values: max((v for v in values if v is not None), default=None),
+    "$first": lambda values: values[0] if values else None,
+    "$last": lambda values: values[-1] if values else None,
+    "$push": list,
+    "$addToSet": _unique,
+}
+
+
+def _group(documents, spec):
+    groups = {}
+    for doc in documents:
+        key = _evaluate(spec.get("_id"), doc)
+        groups.setdefault(json.dumps(key, sort_keys=True, default=str), (key, []))[1].append(doc)
+
+    results = []
+    for key, members in groups.values():
+        result = {"_id": key}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (operator, expression), = accumulator.items()
+            if operator not in _ACCUMULATORS:
+                raise ValueError(f"Unsupported accumulator '{operator}' in local backend")
+            result[field] = _ACCUMULATORS[operator]([_evaluate(expression, doc) for doc in members])
+        results.append(result)
+    return results
+
+
+def _sort_key(value):
+    # Mongo orders null < numbers < strings < everything else
+    if value is None or value is _MISSING:
+        return (0, 0)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, json.dumps(value, sort_keys=True, default=str))
+
+
+def _sort_documents(documents, spec):
+    documents = list(documents)
+    for field, direction in reversed(list(spec.items())):
+        documents.sort(key=lambda doc: _sort_key(_get_path(doc, field)), reverse=direction == -1)
+    return documents
+
+
+def _unwind(documents, spec):
+    if isinstance(spec, str):
+        spec = {"path": spec}
+    field = spec["path"].lstrip("$")
+    keep_empty = spec.get("preserveNullAndEmptyArrays", False)
+    results = []
+    for doc in documents:
+        value = doc.get(field, _MISSING)
+        if isinstance(value, list) and value:
+            for item in value:
+                results.append({**doc, field: item})
+        elif isinstance(value, list) or value is _MISSING or value is None:
+            if keep_empty:
+                results.append({k: v for k, v in doc.items() if k != field or v is not None})
+        else:
+            results.append(doc)
+    return results
+
+
+def _sort_by_count(documents, expression):
+    grouped = _group(documents, {"_id": expression, "count": {"$sum": 1}})
+    return _sort_documents(grouped, {"count": -1})
+
+
+_STAGES = {
+    "$match": lambda docs, spec: [doc for doc in docs if _matches(doc, spec)],
+    "$project": lambda docs, spec: [_project(doc, spec) for doc in docs],
+    "$addFields": lambda docs, spec: [{**doc, **{k: _evaluate(v, doc) for k, v in spec.items()}} for doc in docs],
+    "$set": lambda docs, spec: [{**doc, **{k: _evaluate(v, doc) for k, v in spec.items()}} for doc in docs],
+    "$unset": lambda docs, spec: [_project(doc, {f: 0 for f in ([spec] if isinstance(spec, str) else spec)})
+                                  for doc in docs],
+    "$group": _group,
+    "$sort": _sort_documents,
+    "$limit": lambda docs, spec: docs[:spec],
+    "$skip": lambda docs, spec: docs[spec:],
+    "$unwind": _unwind,
+    "$count": lambda docs, spec: [{spec: len(docs)}] if docs else [],
+    "$sortByCount": _sort_by_count,
+}
+
+
+if __name__ == "__main__":
+    # Usage: python data_backend.py mirror <path>
+    # Copies the live collections (MONGODB_URL) to an on-disk fixture for DATA_BACKEND=local.
+    if len(sys.argv) != 3 or sys.argv[1] != "mirror":
+        sys.exit("Usage: python data_backend.py mirror <path>")
+    mirror_database(open_database("mongo"), sys.argv[2])
+    print(f"Mirrored {', '.join(COLLECTIONS)} to {sys.argv[2]}")
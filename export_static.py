@@ -0,0 +1,231 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+import data_backend  # first: loads .env before dashboard reads its settings
+import dashboard
+import snapshot_store
+from practice_search import get_practice_index
+
+# Static export of the dashboard for read-only consumers. Every figure is computed
+# offline for "Overall" and each firm and written, with the word cloud and the practice
+# table, into a versioned bundle:
+#
+#   <bundle dir>/CURRENT                     name of the newest bundle
+#   <bundle dir>/<version>/manifest.json     firms, files and the source signature
+#   <bundle dir>/<version>/figures/<firm>.json   Plotly figure specs per panel
+#   <bundle dir>/<version>/wordcloud.png
+#   <bundle dir>/<version>/practices.json    rows behind the practice table
+#   <bundle dir>/<version>/index.html, <firm>.html, plotly.min.js   standalone pages
+#
+# The HTML pages open straight from disk or any static file server. With both
+# DASHBOARD_BUNDLE_DIR and SNAPSHOT_DIR set, app.py serves the dashboard from the
+# bundle (no database reads, no pipeline) for as long as the bundle was built from the
+# current snapshot (see snapshot_store.py). Freshness is therefore whatever the
+# snapshot publisher maintains: rerun this export (or `snapshot_store.py publish`
+# followed by this export) on a schedule, and viewers switch over on their next check.
+# The check itself only reads two small files. Without SNAPSHOT_DIR the bundle is
+# still written for static hosting, but app.py always renders the live dashboard.
+#
+# Usage:
+#   python export_static.py --output dashboard_bundle
+
+DEFAULT_BUNDLE_DIR = "dashboard_bundle"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+# Bundles kept besides the current one, for viewers still holding an older version
+KEEP_BUNDLES = 2
+# Seconds a freshness check of the current bundle is reused
+BUNDLE_CHECK_INTERVAL = float(os.getenv("DASHBOARD_BUNDLE_CHECK_INTERVAL", "30"))
+
+_bundles = {}
+_checked = {}
+_bundle_lock = threading.Lock()
+
+
+def _slug(firm):
+    return re.sub(r"[^a-z0-9]+", "-", firm.lower()).strip("-") or "firm"
+
+
+# What a bundle was built from: the current snapshot's fingerprint, or None without a
+# snapshot store. A bundle is only served while this is unchanged.
+def source_signature():
+    store = snapshot_store.get_store()
+    if store is None:
+        return None
+    version = store.current_version()
+    return {"snapshot": store.manifest(version)["fingerprint"] if version else None}
+
+
+# ------------------------------------- Export --------------------------------------------- #
+
+def _page(title, firm_options, current_slug, figures, table_html):
+    nav = " | ".join(
+        f'<b>{html.escape(firm)}</b>' if _slug(firm) == current_slug
+        else f'<a href="{"index" if firm == "Overall" else _slug(firm)}.html">{html.escape(firm)}</a>'
+        for firm in firm_options
+    )
+    rows, scripts = [], []
+    for row in dashboard.DASHBOARD_LAYOUT:
+        columns = " ".join(f"{width}fr" for _, width in row)
+        cells = []
+        for name, _ in row:
+            if name == "wordcloud":
+                cells.append('<div><h3>Specializations Word Cloud</h3><img src="wordcloud.png" alt="Word cloud"></div>')
+            else:
+                cells.append(f'<div id="{name}"></div>')
+                scripts.append(f'Plotly.newPlot("{name}", figures["{name}"].data, figures["{name}"].layout, '
+                               f'{{responsive: true}});')
+        rows.append(f'<div class="row" style="grid-template-columns: {columns}">{"".join(cells)}</div>')
+    # Keep a "</script>" inside a figure string from closing the script element
+    figures_json = json.dumps(figures).replace("</", "<\\/")
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<script src="plotly.min.js"></script>
+<style>
+body {{ font-family: sans-serif; margin: 1.5rem; }}
+.row {{ display: grid; gap: 1rem; margin-bottom: 1rem; }}
+.row img {{ max-width: 100%; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ddd; padding: 0.3rem 0.6rem; text-align: left; }}
+</style>
+</head>
+<body>
+<h1>Integrated Legal Analytics Dashboard</h1>
+<p>{nav}</p>
+{"".join(rows)}
+<h3>Practice Areas and Firms Offering Them</h3>
+{table_html}
+<script>
+const figures = {figures_json};
+{"".join(scripts)}
+</script>
+</body>
+</html>
+"""
+
+
+def export_bundle(database, root=DEFAULT_BUNDLE_DIR):
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    data = dashboard.load_dashboard_data(database)
+    # Taken after loading, which may have published the first snapshot
+    signature = source_signature()
+    data['figure_cache'] = {}
+    firm_options = dashboard.get_firm_options(data)
+
+    digest = hashlib.sha256(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{digest}"
+    staging = root / f".{version}.tmp"
+    (staging / "figures").mkdir(parents=True)
+
+    (staging / "plotly.min.js").write_text(get_plotlyjs(), encoding="utf-8")
+    (staging / "wordcloud.png").write_bytes(dashboard.get_wordcloud_png(data))
+    practices = data['practices'].reindex(columns=['standardized_title', 'firm', 'specializations'])
+    (staging / "practices.json").write_text(practices.to_json(orient="records"), encoding="utf-8")
+
+    firms = {}
+    for firm in firm_options:
+        slug = _slug(firm)
+        figures = {name: json.loads(pio.to_json(fig))
+                   for name, fig in dashboard.build_dashboard_figures(data, firm).items()}
+        (staging / "figures" / f"{slug}.json").write_text(json.dumps(figures), encoding="utf-8")
+        table = dashboard.build_practice_table(data, firms=None if firm == "Overall" else [firm])
+        page = "index.html" if firm == "Overall" else f"{slug}.html"
+        (staging / page).write_text(
+            _page(f"Dashboard - {firm}", firm_options, slug, figures, table.to_html(index=False)), encoding="utf-8")
+        firms[firm] = {"figures": f"figures/{slug}.json", "page": page}
+
+    manifest = {
+        "version": version,
+        "created": time.time(),
+        "signature": signature,
+        "firm_options": firm_options,
+        "firms": firms,
+        "wordcloud": "wordcloud.png",
+        "practices": "practices.json",
+    }
+    (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(staging, root / version)
+    tmp = root / f".{CURRENT_FILE}.{os.getpid()}.tmp"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, root / CURRENT_FILE)
+
+    # Drop bundles beyond the newest few
+    bundles = sorted(path.name for path in root.iterdir() if (path / MANIFEST_FILE).exists() and path.name != version)
+    for old in bundles[:max(0, len(bundles) - KEEP_BUNDLES)]:
+        shutil.rmtree(root / old, ignore_errors=True)
+    return version
+
+
+# ------------------------------------- Viewer --------------------------------------------- #
+
+def _load_bundle(path):
+    with open(path / MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+    figure_cache = {}
+    for firm, entry in manifest["firms"].items():
+        with open(path / entry["figures"], encoding="utf-8") as f:
+            figure_cache[firm] = {name: pio.from_json(json.dumps(spec)) for name, spec in json.load(f).items()}
+    figure_cache['wordcloud_png'] = (path / manifest["wordcloud"]).read_bytes()
+    practices = pd.read_json(path / manifest["practices"], orient="records")
+    return {
+        "manifest": manifest,
+        "firm_options": manifest["firm_options"],
+        # Shaped like dashboard data, so dashboard.render_dashboard can lay it out
+        "data": {"figure_cache": figure_cache, "practice_index": get_practice_index(practices)},
+    }
+
+
+# The current bundle under `root` if it was built from the current snapshot, else None
+# (always None without SNAPSHOT_DIR). Loaded bundles are cached in-process and the
+# snapshot fingerprint is re-read at most every BUNDLE_CHECK_INTERVAL seconds.
+def current_bundle(root):
+    if snapshot_store.get_store() is None:
+        return None
+    root = Path(root)
+    try:
+        version = (root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    with _bundle_lock:
+        if version not in _bundles:
+            _bundles.clear()
+            _bundles[version] = _load_bundle(root / version)
+        bundle = _bundles[version]
+    checked = _checked.get("signature")
+    if checked is None or time.monotonic() - checked[0] > BUNDLE_CHECK_INTERVAL:
+        checked = (time.monotonic(), source_signature())
+        _checked["signature"] = checked
+    signature = bundle["manifest"]["signature"]
+    return bundle if signature is not None and signature == checked[1] else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the dashboard as a static, versioned bundle.")
+    parser.add_argument("--output", default=os.getenv("DASHBOARD_BUNDLE_DIR", DEFAULT_BUNDLE_DIR))
+    args = parser.parse_args(argv)
+    version = export_bundle(data_backend.get_database(), args.output)
+    print(f"Exported {Path(args.output) / version}", file=sys.stderr)
+    if snapshot_store.get_store() is None:
+        print("SNAPSHOT_DIR is not set: app.py will not serve this bundle", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import difflib
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+# Resolves the free-text `education` field of team members to canonical institution
+# names. Each distinct education string is parsed once (memoized); every extracted
+# name is matched against INSTITUTION_ALIASES exactly, then by weighted token overlap
+# so spelling and naming variants ("SUNY Buffalo Law", "UB Law") land on one entry.
+
+# Canonical institution -> variants seen in firm bios
+INSTITUTION_ALIASES = {
+    'University at Buffalo': [
+        'University at Buffalo School of Law', 'University at Buffalo Law School',
+        'State University of New York at Buffalo', 'State University of New York at Buffalo Law School',
+        'State University of New York at Buffalo School of Law', 'SUNY at Buffalo', 'SUNY Buffalo',
+        'SUNY Buffalo Law', 'SUNY Buffalo Law School', 'SUNY Buffalo School of Law', 'UB Law',
+        'UB School of Law', 'University of Buffalo', 'University of Buffalo Law School', 'Buffalo Law School',
+    ],
+    'Buffalo State University': ['Buffalo State College', 'SUNY Buffalo State', 'Buffalo State'],
+    'Cornell University': ['Cornell Law School', 'Cornell University Law School', 'Cornell Law'],
+    'Georgetown University': ['Georgetown University Law Center', 'Georgetown Law', 'Georgetown Law Center'],
+    'Syracuse University': ['Syracuse University College of Law', 'Syracuse College of Law', 'Syracuse Law'],
+    'Albany Law School': ['Albany Law School of Union University', 'Albany Law'],
+    'Fordham University': ['Fordham University School of Law', 'Fordham Law School', 'Fordham Law'],
+    'Harvard University': ['Harvard Law School', 'Harvard College'],
+    'Columbia University': ['Columbia Law School', 'Columbia University School of Law'],
+    'New York University': ['New York University School of Law', 'NYU School of Law', 'NYU Law', 'NYU'],
+    'Hofstra University': ['Hofstra University School of Law', 'Maurice A. Deane School of Law at Hofstra University',
+                           'Hofstra Law'],
+    'Pace University': ['Pace University School of Law', 'Elisabeth Haub School of Law at Pace University',
+                        'Pace Law School'],
+    'Canisius University': ['Canisius College'],
+    'New York Law School': ['NYLS'],
+    'University of Rochester': ['U of R', 'UR'],
+    'Rochester Institute of Technology': ['RIT'],
+    'Case Western Reserve University': ['Case Western Reserve University School of Law', 'Case Western'],
+    'University of Pittsburgh': ['University of Pittsburgh School of Law', 'Pitt Law'],
+    'Duquesne University': ['Duquesne University School of Law', 'Duquesne Law'],
+}
+
+# Minimum weighted token overlap for a fuzzy match
+MATCH_THRESHOLD = 0.8
+
+_QUOTED = re.compile(r"'([^']+)'")
+_INSTITUTION_KEYWORD = re.compile(r'\b(University|College|School|Institute)\b', re.IGNORECASE)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words that never distinguish one institution from another
+_IGNORED_TOKENS = {'the', 'of', 'at', 'in', 'and', 'for', 'law', 'school', 'center', 'centre', 'faculty'}
+# Words that describe the kind of institution; they count, but much less than names
+_TYPE_TOKENS = {'university', 'college', 'institute'}
+_TYPE_WEIGHT = 0.25
+# Cities and states in institution names. They are shared by unrelated institutions
+# ("New York Law School", "New York University"), so a match resting on them alone
+# must cover every token of the variant.
+_PLACE_TOKENS = {'new', 'york', 'buffalo', 'rochester', 'syracuse', 'albany', 'ithaca', 'pittsburgh',
+                 'cleveland', 'washington', 'boston', 'cambridge', 'pennsylvania', 'ohio'}
+
+
+def _normalize(name):
+    return ' '.join(_TOKEN.findall(name.lower().replace('&', ' and ')))
+
+
+def _core_tokens(name):
+    return frozenset(token for token in _TOKEN.findall(name.lower()) if token not in _IGNORED_TOKENS)
+
+
+def _weight(token):
+    return _TYPE_WEIGHT if token in _TYPE_TOKENS else 1.0
+
+
+def _build_indexes():
+    exact = {}
+    variants = []
+    by_token = {}
+    for canonical, aliases in INSTITUTION_ALIASES.items():
+        for alias in [canonical] + aliases:
+            exact[_normalize(alias)] = canonical
+            tokens = _core_tokens(alias)
+            if not tokens:
+                continue
+            variants.append((tokens, canonical))
+            for token in tokens - _TYPE_TOKENS:
+                by_token.setdefault(token, []).append(len(variants) - 1)
+    return exact, variants, by_token
+
+
+_EXACT, _VARIANTS, _VARIANTS_BY_TOKEN = _build_indexes()
+
+
+def _same_token(a, b):
+    return a == b or (min(len(a), len(b)) >= 5 and difflib.SequenceMatcher(None, a, b).ratio() >= 0.85)
+
+
+def _place_only(tokens, variant_tokens):
+    shared = {v for v in variant_tokens if any(_same_token(t, v) for t in tokens)}
+    return shared <= _PLACE_TOKENS and shared != variant_tokens
+
+
+def _overlap(tokens, variant_tokens):
+    shared = sum(_weight(t) for t in tokens if any(_same_token(t, v) for v in variant_tokens))
+    union = sum(_weight(t) for t in tokens) + sum(
+        _weight(v) for v in variant_tokens if not any(_same_token(t, v) for t in tokens))
+    return shared / union if union else 0.0
+
+
+# Canonical name for one institution string, or None when it is not a known institution
+@lru_cache(maxsize=16384)
+def resolve_institution(name):
+    canonical = _EXACT.get(_normalize(name))
+    if canonical:
+        return canonical
+
+    tokens = _core_tokens(name)
+    candidates = {index for token in tokens - _TYPE_TOKENS for index in _VARIANTS_BY_TOKEN.get(token, ())}
+    if not candidates:
+        # Only pay for typo-tolerant lookups when no token matched exactly
+        candidates = {
+            index for token in tokens - _TYPE_TOKENS
+            for known, indexes in _VARIANTS_BY_TOKEN.items() if _same_token(token, known)
+            for index in indexes
+        }
+    best_score, best = 0.0, None
+    for index in candidates:
+        variant_tokens, canonical = _VARIANTS[index]
+        if _place_only(tokens, variant_tokens):
+            continue
+        score = _overlap(tokens, variant_tokens)
+        if score > best_score:
+            best_score, best = score, canonical
+    return best if best_score >= MATCH_THRESHOLD else None
+
+
+# Institutions named in one `education` value, e.g. "['UB Law, J.D.', 'Cornell University, B.A.']".
+# Unknown names are kept as written when they look like an institution; each
+# institution is listed once per person.
+@lru_cache(maxsize=16384)
+def extract_institutions(education):
+    institutions = []
+    for match in _QUOTED.findall(education):
+        name = match.split(',')[0].strip()
+        institution = resolve_institution(name)
+        if institution is None and _INSTITUTION_KEYWORD.search(name):
+            institution = name
+        if institution and institution not in institutions:
+            institutions.append(institution)
+    return tuple(institutions) or ('Unknown',)
+
+
+# Vectorised form for a whole column: every distinct string is resolved once and the
+# results are mapped back onto the rows.
+def resolve_education_column(education):
+    education = pd.Series(education)
+    present = education.notna()
+    resolved = {value: list(extract_institutions(str(value))) for value in education[present].unique()}
+    return education.map(lambda value: resolved.get(value, ['Unknown']) if pd.notna(value) else ['Unknown'])
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+# Result of one chat completion, independent of the provider that produced it
+Completion = namedtuple("Completion", ["text", "prompt_tokens", "completion_tokens", "cached"])
+
+DEFAULT_CASSETTE = "cassettes/llm.jsonl"
+
+_llm = None
+_llm_lock = threading.Lock()
+
+
+# Return the process-wide LLM backend, creating it on first use.
+# LLM_BACKEND selects the implementation:
+#   openai - live OpenAI chat completions (default, needs OPENAI_API_KEY)
+#   record - live OpenAI calls, each one also appended to the cassette at LLM_CASSETTE
+#   replay - answers served from the cassette at LLM_CASSETTE, no network access
+def get_llm():
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = open_llm(os.getenv("LLM_BACKEND", "openai"))
+        return _llm
+
+
+# Replace the process-wide backend (benchmarks and tests wrap or stub it)
+def set_llm(backend):
+    global _llm
+    with _llm_lock:
+        _llm = backend
+
+
+# Every backend is put behind the process-wide request scheduler (see llm_scheduler.py)
+def open_llm(backend="openai"):
+    from llm_scheduler import schedule
+    backend = backend.lower()
+    cassette = os.getenv("LLM_CASSETTE", DEFAULT_CASSETTE)
+    if backend == "openai":
+        return schedule(OpenAIBackend())
+    if backend == "record":
+        return schedule(RecordingBackend(OpenAIBackend(), cassette))
+    if backend == "replay":
+        return schedule(ReplayBackend(cassette, latency=os.getenv("LLM_REPLAY_LATENCY", "recorded")))
+    raise ValueError(f"Unknown LLM_BACKEND '{backend}'. Use 'openai', 'record' or 'replay'.")
+
+
+# Stable key for a request, so a replayed cassette matches regardless of dict ordering
+def request_key(messages, model, max_tokens, temperature=None):
+    payload = json.dumps(
+        {"messages": messages, "model": model, "max_tokens": max_tokens, "temperature": temperature},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class OpenAIBackend:
+    def __init__(self, api_key=None):
+        from openai import OpenAI
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is not set.")
+        # No retries inside the SDK: llm_scheduler owns them, so retried calls still go
+        # through the shared pause and the rate buckets
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+
+    def complete(self, messages, model, max_tokens, temperature=None):
+        params = {"messages": messages, "model": model, "max_tokens": max_tokens}
+        if temperature is not None:
+            params["temperature"] = temperature
+        response = self.client.chat.completions.create(**params)
+        usage = response.usage
+        return Completion(
+            text=response.choices[0].message.content,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            cached=False,
+        )
+
+
+class RecordingBackend:
+    def __init__(self, backend, cassette_path):
+        self.backend = backend
+        self.cassette_path = Path(cassette_path)
+        self.cassette_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def complete(self, messages, model, max_tokens, temperature=None):
+        start = time.perf_counter()
+        completion = self.backend.complete(messages, model, max_tokens, temperature)
+        entry = {
+            "key": request_key(messages, model, max_tokens, temperature),
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "text": completion.text,
+            "prompt_tokens": completion.prompt_tokens,
+            "completion_tokens": completion.completion_tokens,
+            "latency": round(time.perf_counter() - start, 4),
+        }
+        with self._lock, open(self.cassette_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return completion
+
+
+class ReplayBackend:
+    # `latency` is either "recorded" (sleep as long as the original call took) or a
+    # fixed number of seconds to sleep before every answer ("0" disables sleeping).
+    def __init__(self, cassette_path, latency="recorded"):
+        self.latency = latency if latency == "recorded" else float(latency)
+        self._entries = {}
+        if not Path(cassette_path).is_file():
+            raise ValueError(f"No LLM cassette at {cassette_path}; record one first with LLM_BACKEND=record "
+                             f"(or point LLM_CASSETTE at an existing cassette).")
+        with open(cassette_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+
+    def complete(self, messages, model, max_tokens, temperature=None):
+        entry = self._entries.get(request_key(messages, model, max_tokens, temperature))
+        if entry is None:
+            raise LookupError("No recorded completion for this request; re-record the cassette with LLM_BACKEND=record.")
+        delay = entry.get("latency", 0) if self.latency == "recorded" else self.latency
+        if delay:
+            time.sleep(delay)
+        return Completion(
+            text=entry["text"],
+            prompt_tokens=entry.get("prompt_tokens", 0),
+            completion_tokens=entry.get("completion_tokens", 0),
+            cached=True,
+        )
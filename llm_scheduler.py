@@ -0,0 +1,185 @@
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from llm_backend import request_key
+from ratelimit import TokenBucket
+
+# Central scheduler in front of an LLM backend. Every completion in the process goes
+# through one priority queue drained by a fixed number of dispatcher threads, which
+# only start a request when the requests-per-minute and tokens-per-minute buckets
+# allow it. Rate-limit and transient provider errors are retried with exponential
+# backoff and jitter, or after the server's Retry-After plus jitter, and pause
+# dispatching for everyone, since the limit is shared. A retried request goes back into
+# the queue at its original position, so it takes fresh request and token credits.
+# Identical requests issued while one is already in flight wait for that one instead
+# of paying for their own completion.
+
+INTERACTIVE = 0
+BATCH = 10
+
+# Seconds of traffic a full bucket may release at once
+BURST_SECONDS = 10
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"}
+
+
+# Run the enclosed completions at `level` (lower runs first), e.g. BATCH for bulk jobs
+@contextmanager
+def priority(level):
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _is_retryable(error):
+    return getattr(error, "status_code", None) in _RETRYABLE_STATUS or type(error).__name__ in _RETRYABLE_ERRORS
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages, max_tokens):
+    return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+
+class _Job:
+    def __init__(self, key, args, tokens, priority, sequence):
+        self.key = key
+        self.args = args
+        self.tokens = tokens
+        self.priority = priority
+        self.sequence = sequence
+        self.attempt = 0
+        self.future = Future()
+
+
+class SchedulingBackend:
+    def __init__(self, backend, requests_per_minute=None, tokens_per_minute=None, max_concurrency=8,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.backend = backend
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute / 60 * BURST_SECONDS) \
+            if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 60 * BURST_SECONDS) \
+            if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"requests": 0, "coalesced": 0, "retries": 0, "failed": 0}
+
+        self._queue = []
+        self._sequence = itertools.count()
+        self._inflight = {}
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+        for i in range(max_concurrency):
+            threading.Thread(target=self._dispatch, name=f"llm-dispatch-{i}", daemon=True).start()
+
+    def complete(self, messages, model, max_tokens, temperature=None):
+        key = request_key(messages, model, max_tokens, temperature)
+        with self._condition:
+            job = self._inflight.get(key)
+            if job is not None:
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                job = _Job(key, (messages, model, max_tokens, temperature), estimate_tokens(messages, max_tokens),
+                           _priority.get(), next(self._sequence))
+                self._inflight[key] = job
+                heapq.heappush(self._queue, (job.priority, job.sequence, job))
+                self.stats["requests"] += 1
+                self._condition.notify()
+                leader = True
+
+        completion = job.future.result()
+        return completion if leader else completion._replace(cached=True)
+
+    # Seconds until the next request may start (0 when it may start now); caller holds the lock
+    def _wait_time(self, job):
+        waits = [self._paused_until - time.monotonic()]
+        if self.requests:
+            waits.append(self.requests.wait_time(1))
+        if self.tokens:
+            waits.append(self.tokens.wait_time(job.tokens))
+        return max(waits)
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while True:
+                    if not self._queue:
+                        self._condition.wait()
+                        continue
+                    # Always re-check the head: a higher-priority job may have arrived
+                    job = self._queue[0][2]
+                    wait = self._wait_time(job)
+                    if wait > 0:
+                        self._condition.wait(timeout=wait)
+                        continue
+                    if self.requests:
+                        self.requests.try_acquire(1)
+                    if self.tokens:
+                        self.tokens.try_acquire(job.tokens)
+                    heapq.heappop(self._queue)
+                    break
+            self._run(job)
+
+    def _run(self, job):
+        try:
+            result = self.backend.complete(*job.args)
+        except Exception as e:
+            if not _is_retryable(e) or job.attempt >= self.max_retries:
+                self.stats["failed"] += 1
+                self._finish(job, error=e)
+                return
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                # Never earlier than the server asked for
+                delay = retry_after + random.uniform(0, self.base_delay)
+            else:
+                delay = min(self.max_delay, self.base_delay * 2 ** job.attempt) * random.uniform(0.5, 1.5)
+            job.attempt += 1
+            with self._condition:
+                self.stats["retries"] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                # Back into the queue: dispatching waits out the pause and takes new credits
+                heapq.heappush(self._queue, (job.priority, job.sequence, job))
+                self._condition.notify()
+            return
+        self._finish(job, result=result)
+
+    def _finish(self, job, result=None, error=None):
+        with self._condition:
+            self._inflight.pop(job.key, None)
+            self._condition.notify_all()
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+
+# Wrap `backend` with limits from LLM_RPM / LLM_TPM (unset means unlimited) and
+# LLM_MAX_CONCURRENCY dispatcher threads
+def schedule(backend):
+    return SchedulingBackend(
+        backend,
+        requests_per_minute=float(os.getenv("LLM_RPM", "0")) or None,
+        tokens_per_minute=float(os.getenv("LLM_TPM", "0")) or None,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    )
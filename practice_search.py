@@ -0,0 +1,197 @@
+import ast
+import difflib
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Search-as-you-type index over the practice areas (`standardized_title`) and the
+# firms offering them. Built once per practices snapshot: every title and
+# specialization word is indexed by all of its prefixes, and by its trigrams so a
+# misspelled word ("immigation") still finds its closest vocabulary words. A query
+# then only touches the entries sharing its words instead of scanning every row.
+
+# Score of a query word matching a title word exactly, as a prefix, or with a typo
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+FUZZY_SCORE = 0.6
+# Minimum difflib ratio for a typo match, and the shortest query word tried fuzzily
+FUZZY_CUTOFF = 0.75
+FUZZY_MIN_LENGTH = 4
+
+# Indexes kept for the most recently seen snapshots, and query words memoized per index
+CACHE_SIZE = 4
+LOOKUP_CACHE_SIZE = 4096
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _tokens(text):
+    return _TOKEN.findall(str(text).lower().replace('&', ' and '))
+
+
+def _trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _parse_list(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    try:
+        parsed = ast.literal_eval(value) if isinstance(value, str) else []
+    except (ValueError, SyntaxError):
+        return [value]
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
+class _WordIndex:
+    def __init__(self):
+        self.prefixes = {}
+        self.trigrams = {}
+        self.words = {}
+
+    def add(self, word, entry_id):
+        self.words.setdefault(word, set()).add(entry_id)
+        for end in range(1, len(word) + 1):
+            self.prefixes.setdefault(word[:end], set()).add(entry_id)
+        for gram in _trigrams(word):
+            self.trigrams.setdefault(gram, set()).add(word)
+
+    # Entry id -> best score for one query word
+    def lookup(self, word):
+        scores = dict.fromkeys(self.prefixes.get(word, ()), PREFIX_SCORE)
+        scores.update(dict.fromkeys(self.words.get(word, ()), EXACT_SCORE))
+        if scores or len(word) < FUZZY_MIN_LENGTH:
+            return scores
+        # A word still being typed is compared with the same-length start of each candidate
+        matcher = difflib.SequenceMatcher(b=word)
+        for candidate in set().union(*(self.trigrams.get(gram, ()) for gram in _trigrams(word))):
+            if any(self._close(matcher, text) for text in (candidate, candidate[:len(word) + 1])):
+                scores.update(dict.fromkeys(self.words[candidate], FUZZY_SCORE))
+        return scores
+
+    @staticmethod
+    def _close(matcher, text):
+        matcher.set_seq1(text)
+        return matcher.real_quick_ratio() >= FUZZY_CUTOFF and matcher.quick_ratio() >= FUZZY_CUTOFF \
+            and matcher.ratio() >= FUZZY_CUTOFF
+
+
+class PracticeSearchIndex:
+    def __init__(self, practices_df):
+        titles = practices_df.get('standardized_title', pd.Series(dtype=object))
+        firms = practices_df.get('firm', pd.Series(index=titles.index, dtype=object))
+        specializations = practices_df.get('specializations', pd.Series(index=titles.index, dtype=object))
+
+        by_title = {}
+        for title, firm, specs in zip(titles, firms, specializations):
+            if pd.isna(title):
+                continue
+            entry = by_title.setdefault(title, {'firms': set(), 'specializations': set()})
+            if not pd.isna(firm):
+                entry['firms'].add(firm)
+            if isinstance(specs, (list, tuple)) or not pd.isna(specs):
+                for specialization in _parse_list(specs):
+                    entry['specializations'].update(_tokens(specialization))
+
+        # Entries are kept in title order, the order of an unfiltered table
+        self.titles = sorted(by_title)
+        self.firms = [sorted(by_title[title]['firms']) for title in self.titles]
+        self.offered_by = [', '.join(firms) for firms in self.firms]
+        self._normalized = [' '.join(_tokens(title)) for title in self.titles]
+        self._titles = _WordIndex()
+        self._specializations = _WordIndex()
+        for entry_id, title in enumerate(self.titles):
+            for word in set(_tokens(title)):
+                self._titles.add(word, entry_id)
+            for word in by_title[title]['specializations']:
+                self._specializations.add(word, entry_id)
+
+        self._lookups = {}
+
+    def __len__(self):
+        return len(self.titles)
+
+    # Memoized per index. Sessions share the index without a lock, so the result is
+    # returned from a local: another thread may clear the memo between store and return.
+    def _lookup(self, index, word):
+        key = (id(index), word)
+        scores = self._lookups.get(key)
+        if scores is None:
+            scores = index.lookup(word)
+            if len(self._lookups) >= LOOKUP_CACHE_SIZE:
+                self._lookups.clear()
+            self._lookups[key] = scores
+        return scores
+
+    # Entries matching every word of `text` in `index`, with their average word score
+    def _match_all(self, index, text):
+        scores = None
+        words = _tokens(text)
+        for word in words:
+            matches = self._lookup(index, word)
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {entry_id: score + matches[entry_id] for entry_id, score in scores.items()
+                          if entry_id in matches}
+            if not scores:
+                return {}
+        return {entry_id: score / len(words) for entry_id, score in scores.items()} if words else None
+
+    # Ranked entry ids for a title query, optionally limited to practices offered by any of
+    # `firms` and to practices whose specializations contain every `specialization` word
+    def search(self, query="", firms=None, specialization="", limit=None):
+        scores = self._match_all(self._titles, query)
+        candidates = range(len(self.titles)) if scores is None else scores
+
+        if specialization:
+            allowed = self._match_all(self._specializations, specialization)
+            if allowed is not None:
+                candidates = [entry_id for entry_id in candidates if entry_id in allowed]
+        if firms:
+            firms = set(firms)
+            candidates = [entry_id for entry_id in candidates if firms.intersection(self.firms[entry_id])]
+
+        if scores is None:
+            ranked = sorted(candidates)
+        else:
+            # Titles that start with the query rank first, then by match quality, then by title
+            phrase = ' '.join(_tokens(query))
+            ranked = sorted(candidates, key=lambda entry_id: (
+                not self._normalized[entry_id].startswith(phrase), -scores[entry_id], entry_id))
+        return ranked[:limit] if limit else ranked
+
+    def frame(self, entry_ids):
+        return pd.DataFrame({
+            'Practice Area': [self.titles[entry_id] for entry_id in entry_ids],
+            'Offered by Firm': [self.offered_by[entry_id] for entry_id in entry_ids],
+        })
+
+
+def snapshot_key(practices_df):
+    columns = [column for column in ('standardized_title', 'firm', 'specializations') if column in practices_df]
+    if not columns or practices_df.empty:
+        return (len(practices_df), tuple(columns))
+    hashed = pd.util.hash_pandas_object(practices_df[columns].astype(str), index=False)
+    return (len(practices_df), int(hashed.sum()))
+
+
+# Index for this practices snapshot, built only the first time the snapshot is seen
+def get_practice_index(practices_df):
+    key = snapshot_key(practices_df)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    index = PracticeSearchIndex(practices_df)
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
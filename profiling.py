@@ -0,0 +1,151 @@
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Opt-in render profiler for the dashboard. Enable it with DASHBOARD_PROFILE set to:
+#   1 / timing   - per-stage wall time, memory delta and DataFrame sizes
+#   cprofile     - the above plus a cProfile dump of the whole render
+#   pyinstrument - the above plus a pyinstrument HTML report (needs pyinstrument)
+#   param        - nothing by default; renders opened with `?profile=<mode>` are profiled
+# While DASHBOARD_PROFILE is set, `?profile=<mode>` overrides it for one render; when it
+# is unset the query parameter is ignored.
+# Reports are written to DASHBOARD_PROFILE_DIR (default: profiles/).
+
+PROFILE_MODES = {"1", "timing", "cprofile", "pyinstrument"}
+
+
+# Measurements for one stage; `frame()` lets the stage report the DataFrame it produced
+class StageRecord:
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.ms = None
+        self.mem_delta_kb = None
+        self.mem_peak_kb = None
+        self.rows = None
+        self.columns = None
+        self.frame_kb = None
+
+    def frame(self, df):
+        if isinstance(df, pd.DataFrame):
+            self.rows, self.columns = df.shape
+            self.frame_kb = round(df.memory_usage(deep=True).sum() / 1024, 1)
+        return df
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, mode="timing", report_dir=None):
+        self.mode = mode
+        self.report_dir = Path(report_dir or os.getenv("DASHBOARD_PROFILE_DIR", "profiles"))
+        self.records = []
+        self.report_path = None
+        self._profiler = None
+        self._started_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.mode == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == "pyinstrument":
+            from pyinstrument import Profiler as Pyinstrument
+            self._profiler = Pyinstrument()
+            self._profiler.start()
+        self._start = time.perf_counter()
+
+    def stop(self):
+        total = StageRecord("total", "render")
+        total.ms = round((time.perf_counter() - self._start) * 1000, 2)
+        self.records.append(total)
+
+        if self._profiler is not None:
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            if self.mode == "cprofile":
+                self._profiler.disable()
+                self.report_path = self.report_dir / f"dashboard-{stamp}.prof"
+                self._profiler.dump_stats(self.report_path)
+            else:
+                self._profiler.stop()
+                self.report_path = self.report_dir / f"dashboard-{stamp}.html"
+                self.report_path.write_text(self._profiler.output_html(), encoding="utf-8")
+            self._profiler = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, kind, name):
+        record = StageRecord(kind, name)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.ms = round((time.perf_counter() - start) * 1000, 2)
+            after, peak = tracemalloc.get_traced_memory()
+            record.mem_delta_kb = round((after - before) / 1024, 1)
+            record.mem_peak_kb = round((peak - before) / 1024, 1)
+            self.records.append(record)
+
+    def summary(self):
+        return pd.DataFrame([
+            {
+                "kind": r.kind,
+                "stage": r.name,
+                "ms": r.ms,
+                "mem delta (KB)": r.mem_delta_kb,
+                "mem peak (KB)": r.mem_peak_kb,
+                "rows": r.rows,
+                "columns": r.columns,
+                "frame size (KB)": r.frame_kb,
+            }
+            for r in self.records
+        ])
+
+
+# Stand-in used when profiling is off; every stage is a no-op
+class NullProfiler:
+    enabled = False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    @contextmanager
+    def stage(self, kind, name):
+        yield _NULL_RECORD
+
+
+class _NullRecord:
+    def frame(self, df):
+        return df
+
+
+_NULL_RECORD = _NullRecord()
+NULL_PROFILER = NullProfiler()
+
+
+# Profiler for one render. `requested` is the `?profile=` query parameter, which is
+# only honoured when DASHBOARD_PROFILE is set, so visitors cannot turn profiling on.
+def get_profiler(requested=None):
+    configured = os.getenv("DASHBOARD_PROFILE", "").lower()
+    if not configured:
+        return NULL_PROFILER
+    mode = (requested or configured).lower()
+    if mode not in PROFILE_MODES:
+        return NULL_PROFILER
+    return Profiler("timing" if mode == "1" else mode)
@@ -0,0 +1,202 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cost-based admission control for LLM-generated queries. Before a generated find or
+# aggregate runs, MongoDB's `explain` (queryPlanner mode, which plans but does not
+# execute) tells us whether it would scan the whole collection. Scans of large
+# collections get a $limit injected (finds, and pipelines that stream documents through)
+# and the answer carries a notice when it was cut short. Aggregations that total or
+# sort their input ($group, $count, $sort, ...) are never capped, since that would
+# return wrong totals that look exact: with a $match they run in full, without one
+# they are rejected. Scans too expensive to run at all are rejected too, with a
+# message asking the user for a narrower question. Decisions are cached per query shape (field names and operators, with
+# literal values erased) so repeated kinds of questions skip the explain round trip.
+
+# Collections at least this large are worth guarding
+LARGE_COLLECTION_DOCS = int(os.getenv("QUERY_LARGE_COLLECTION_DOCS", "5000"))
+# Unfiltered scans beyond this many documents are rejected outright
+MAX_SCANNED_DOCS = int(os.getenv("QUERY_MAX_SCANNED_DOCS", "200000"))
+# Limit injected into unbounded scans of large collections
+DEFAULT_LIMIT = int(os.getenv("QUERY_DEFAULT_LIMIT", "100"))
+
+PLAN_CACHE_SIZE = 512
+PLAN_CACHE_TTL = 600  # seconds; collection sizes drift, so decisions expire
+
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+# ------------------------------------- Query shapes --------------------------------------------- #
+
+def _shape(value):
+    if isinstance(value, dict):
+        if "$regex" in value:
+            pattern = value["$regex"]
+            anchored = isinstance(pattern, str) and pattern.startswith("^")
+            return {"$regex": "anchored" if anchored else "unanchored",
+                    **{k: _shape(v) for k, v in value.items() if k not in ("$regex", "$options")}}
+        return {k: _shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_shape(v) for v in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value  # field reference in an aggregation expression
+    return type(value).__name__
+
+
+def _limit_bucket(limit):
+    if not limit:
+        return None
+    return "small" if limit <= DEFAULT_LIMIT else "large"
+
+
+def query_shape(query_data):
+    return json.dumps({
+        "collection": query_data.get("collection"),
+        "query": _shape(query_data.get("query") or {}),
+        "projection": sorted(query_data.get("projection") or {}),
+        "aggregation": _shape(query_data.get("aggregation") or []),
+        # The decision depends on whether a requested limit is within DEFAULT_LIMIT
+        "limit": _limit_bucket(query_data.get("limit")),
+    }, sort_keys=True)
+
+
+def _has_unanchored_regex(value):
+    if isinstance(value, dict):
+        pattern = value.get("$regex")
+        if isinstance(pattern, str) and not pattern.startswith("^"):
+            return True
+        return any(_has_unanchored_regex(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_unanchored_regex(v) for v in value)
+    return False
+
+
+# ------------------------------------- Planning --------------------------------------------- #
+
+def _plan_stages(explain_output):
+    stages = set()
+
+    def walk(value):
+        if isinstance(value, dict):
+            if isinstance(value.get("stage"), str):
+                stages.add(value["stage"])
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(explain_output)
+    return stages
+
+
+def explain_query(query_data, db):
+    name = query_data["collection"]
+    if query_data.get("aggregation"):
+        command = {"aggregate": name, "pipeline": query_data["aggregation"], "cursor": {}}
+    else:
+        command = {"find": name, "filter": query_data.get("query", {})}
+        if query_data.get("projection"):
+            command["projection"] = query_data["projection"]
+    return db.command("explain", command, verbosity="queryPlanner")
+
+
+# Stages that read their whole input before emitting anything
+_BLOCKING_STAGES = {"$group", "$sort", "$sortByCount", "$count", "$bucket", "$bucketAuto", "$facet"}
+
+
+def _decide(query_data, db):
+    collection = db[query_data["collection"]]
+    try:
+        stages = _plan_stages(explain_query(query_data, db))
+        documents = collection.estimated_document_count()
+    except Exception as e:
+        # Fail open: a backend without explain should not block the chatbot
+        return {"action": "allow", "reason": f"explain unavailable: {e}", "plan": None, "scanned_docs": None}
+
+    collscan = "COLLSCAN" in stages
+    decision = {
+        "action": "allow",
+        "plan": "COLLSCAN" if collscan else ",".join(sorted(stages)) or None,
+        # queryPlanner mode has no execution counts; a collection scan reads everything
+        "scanned_docs": documents if collscan else None,
+        "reason": None,
+    }
+    if not collscan or documents < LARGE_COLLECTION_DOCS:
+        return decision
+
+    aggregation = query_data.get("aggregation")
+    if aggregation:
+        matches = [stage["$match"] for stage in aggregation if "$match" in stage]
+        if documents > MAX_SCANNED_DOCS and not matches:
+            decision.update(action="reject", reason="unfiltered aggregation over the whole collection")
+        elif documents > MAX_SCANNED_DOCS and _has_unanchored_regex(matches):
+            decision.update(action="reject", reason="unanchored text match over the whole collection")
+        elif any(_BLOCKING_STAGES & set(stage) for stage in aggregation):
+            # Capping the input would give wrong totals; filtered ones run in full
+            if not matches:
+                decision.update(action="reject", reason="totals over the whole collection without a filter")
+        elif not any("$limit" in stage for stage in aggregation):
+            decision.update(action="limit", reason="unbounded aggregation over a collection scan")
+        return decision
+
+    if documents > MAX_SCANNED_DOCS and _has_unanchored_regex(query_data.get("query")):
+        decision.update(action="reject", reason="unanchored text match over the whole collection")
+    elif not query_data.get("limit") or query_data["limit"] > DEFAULT_LIMIT:
+        decision.update(action="limit", reason="unbounded collection scan")
+    return decision
+
+
+def _apply(query_data, decision):
+    if decision["action"] != "limit":
+        return query_data
+    query_data = copy.deepcopy(query_data)
+    if query_data.get("aggregation"):
+        # Only pipelines without blocking stages get here, so the limit stops the scan
+        query_data["aggregation"].append({"$limit": DEFAULT_LIMIT})
+    else:
+        query_data["limit"] = DEFAULT_LIMIT
+    return query_data
+
+
+# Note shown with an answer whose query was capped, given the rows it returned
+def limit_notice(decision, row_count):
+    if decision["action"] == "limit" and row_count >= DEFAULT_LIMIT:
+        return f"Showing the first {DEFAULT_LIMIT:,} matches; narrow the question to see the rest."
+    return None
+
+
+# Check a generated query before it runs. Returns (query_data, decision): the query to
+# execute (possibly with a limit applied) and the decision taken, whose `action` is
+# allow, limit or reject.
+def admit_query(query_data, db):
+    shape = query_shape(query_data)
+    now = time.monotonic()
+    with _plan_cache_lock:
+        cached = _plan_cache.get(shape)
+        if cached and now - cached[0] < PLAN_CACHE_TTL:
+            _plan_cache.move_to_end(shape)
+            decision = dict(cached[1], cache_hit=True)
+        else:
+            decision = None
+
+    if decision is None:
+        decision = dict(_decide(query_data, db), cache_hit=False)
+        with _plan_cache_lock:
+            _plan_cache[shape] = (now, decision)
+            while len(_plan_cache) > PLAN_CACHE_SIZE:
+                _plan_cache.popitem(last=False)
+
+    return _apply(query_data, decision), decision
+
+
+# Message shown to the user when a query is rejected
+def rejection_message(query_data, decision):
+    return (
+        f"This question would scan all {decision['scanned_docs']:,} documents in `{query_data['collection']}` "
+        f"({decision['reason']}). Please narrow it down, for example to a specific firm, person or title."
+    )
@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+# Thread-safe token bucket: `rate` tokens are added per second up to `capacity`.
+# acquire() blocks until enough tokens are available.
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Seconds until `amount` tokens are available (0 when they are available now)
+    def wait_time(self, amount=1):
+        with self._lock:
+            self._refill()
+            missing = min(amount, self.capacity) - self._tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+    # Take `amount` tokens if available right now
+    def try_acquire(self, amount=1):
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return True
+            return False
+
+    def acquire(self, amount=1):
+        while not self.try_acquire(amount):
+            time.sleep(max(self.wait_time(amount), 0.001))
@@ -0,0 +1,132 @@
+import ast
+import json
+import logging
+import os
+import re
+
+# Picks how a chatbot answer is produced from the query results:
+#   template - small flat results (a value, a list, counts per group, a short table)
+#              rendered locally as Markdown, with no LLM round trip
+#   fast     - results that still need wording but no real reasoning, sent to
+#              LLM_FAST_MODEL
+#   full     - questions that ask for synthesis (summaries, comparisons, explanations)
+#              or results too large for the fast tier, sent to LLM_FULL_MODEL
+# The chosen tier is logged (logger "response_router", INFO), recorded on the
+# generate_response span as `response_tier` and shown in the chatbot's debug timings.
+
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+FULL_MODEL = os.getenv("LLM_FULL_MODEL", "gpt-4")
+
+# Largest result rendered as a table, and longest text value shown verbatim
+TEMPLATE_MAX_ROWS = 25
+TEMPLATE_MAX_VALUE_CHARS = 200
+# Largest serialized result the fast model is trusted with
+FAST_MAX_BYTES = 4000
+
+# Wording that asks for more than a lookup
+_SYNTHESIS = re.compile(
+    r"\b(summari[sz]e|summary|compare|comparison|why|explain|describe|tell me about|recommend|"
+    r"analy[sz]e|insights?|overview|differences?|should)\b",
+    re.IGNORECASE,
+)
+_LIST_LITERAL = re.compile(r"^\s*\[.*\]\s*$", re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+
+def _is_scalar(value):
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+# Stringified Python lists (how several fields are stored) are shown as comma-separated text
+def _format_value(value):
+    if isinstance(value, str) and _LIST_LITERAL.match(value):
+        try:
+            items = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+        if isinstance(items, list):
+            return ", ".join(str(item) for item in items)
+    if isinstance(value, float):
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"{value:,}"
+    return "" if value is None else str(value)
+
+
+def _label(field, group_label):
+    if field == "_id":
+        return group_label
+    return field.replace("_", " ").strip().capitalize()
+
+
+# The field a $group stage grouped by ("$firm" -> "Firm"), used to label `_id`
+def _group_label(query_data):
+    for stage in (query_data or {}).get("aggregation") or []:
+        group = stage.get("$group") if isinstance(stage, dict) else None
+        if group and isinstance(group.get("_id"), str) and group["_id"].startswith("$"):
+            return _label(group["_id"][1:], "Group")
+    return "Group"
+
+
+def _escape(text):
+    return text.replace("|", "\\|").replace("\n", " ")
+
+
+def _render(rows, group_label):
+    fields = list(dict.fromkeys(field for row in rows for field in row))
+    if not fields:
+        return "No matching records were found."
+
+    if len(rows) == 1 and len(fields) == 1:
+        return f"**{_label(fields[0], group_label)}:** {_format_value(rows[0].get(fields[0]))}"
+
+    if len(fields) == 1:
+        values = list(dict.fromkeys(_format_value(row.get(fields[0])) for row in rows))
+        return f"**{_label(fields[0], group_label)}** ({len(values)}):\n" + "\n".join(f"- {value}" for value in values)
+
+    # Counts per group: {"_id": key, "<count>": n}
+    numeric = [field for field in fields if field != "_id"]
+    if "_id" in fields and len(numeric) == 1 and all(
+            isinstance(row.get(numeric[0]), (int, float)) for row in rows):
+        return f"**{_label(numeric[0], group_label)}** by {group_label.lower()}:\n" + "\n".join(
+            f"- {_format_value(row.get('_id'))}: {_format_value(row.get(numeric[0]))}" for row in rows)
+
+    if len(rows) == 1:
+        return "\n".join(f"**{_label(field, group_label)}:** {_format_value(rows[0].get(field))}" for field in fields)
+
+    header = "| " + " | ".join(_label(field, group_label) for field in fields) + " |"
+    divider = "|" + "---|" * len(fields)
+    lines = ["| " + " | ".join(_escape(_format_value(row.get(field))) for field in fields) + " |" for row in rows]
+    return "\n".join([f"{len(rows)} results:", "", header, divider] + lines)
+
+
+# Returns (tier, text): text is the finished answer for the template tier, else None
+def route(results, question, query_data=None):
+    tier, text = _choose(results, question, query_data)
+    logger.info("response tier %s for %s result rows", tier, len(results) if isinstance(results, list) else "?")
+    return tier, text
+
+
+def _choose(results, question, query_data):
+    if not results:
+        return "template", "No matching records were found."
+    if _SYNTHESIS.search(question or ""):
+        return "full", None
+
+    simple = (
+        isinstance(results, list)
+        and len(results) <= TEMPLATE_MAX_ROWS
+        and all(isinstance(row, dict) for row in results)
+        and all(_is_scalar(value) and len(_format_value(value)) <= TEMPLATE_MAX_VALUE_CHARS
+                for row in results for value in row.values())
+    )
+    if simple:
+        return "template", _render(results, _group_label(query_data))
+    if len(json.dumps(results, default=str).encode("utf-8")) <= FAST_MAX_BYTES:
+        return "fast", None
+    return "full", None
+
+
+def model_for(tier):
+    return FAST_MODEL if tier == "fast" else FULL_MODEL
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+# Shared on-disk store for the dashboard data, so every server process on a node maps
+# one copy of it instead of pulling and deriving its own.
+#
+# A loader publishes the frames returned by dashboard.prepare_dashboard_data as a new
+# immutable version: one Arrow IPC file per frame under <SNAPSHOT_DIR>/<version>/,
+# then CURRENT is switched to it atomically. Workers memory-map the files read-only
+# and wrap them in Arrow-backed DataFrames, so the pages live once in the OS page
+# cache. Every process using a version holds a lease file named after its pid in the
+# version's leases/ directory; old versions are deleted once no live process holds a
+# lease (leases of dead processes are ignored).
+#
+# Usage:
+#   python snapshot_store.py publish   # pull from the database and publish a version
+#   python snapshot_store.py status    # list versions and their leases
+#   python snapshot_store.py gc        # delete unreferenced old versions
+
+DEFAULT_SNAPSHOT_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+LEASES_DIR = "leases"
+
+# Raw collections whose content identifies a snapshot (derived frames follow from them)
+SOURCE_FRAMES = ["articles", "careers", "teams", "practices"]
+# Times load() re-reads CURRENT when the version it read is collected under it
+LOAD_ATTEMPTS = 5
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Process-wide store at SNAPSHOT_DIR, or None when snapshots are not configured
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None and os.getenv("SNAPSHOT_DIR"):
+            _store = SnapshotStore(os.getenv("SNAPSHOT_DIR"))
+        return _store
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_atomic(path, text):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class SnapshotStore:
+    def __init__(self, root=DEFAULT_SNAPSHOT_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = None
+
+    def current_version(self):
+        try:
+            return (self.root / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version):
+        with open(self.root / version / MANIFEST_FILE, encoding="utf-8") as f:
+            return json.load(f)
+
+    def versions(self):
+        return sorted(path.name for path in self.root.iterdir() if (path / MANIFEST_FILE).exists())
+
+    # ------------------------------------- Writing --------------------------------------------- #
+
+    # Write the DataFrames in `data` as a new version and make it current. Returns the
+    # current version unchanged when the source frames are identical to it.
+    def publish(self, data):
+        tables = {name: pa.Table.from_pandas(frame, preserve_index=False)
+                  for name, frame in data.items() if isinstance(frame, pd.DataFrame)}
+        fingerprint = hashlib.sha256()
+        for name in SOURCE_FRAMES:
+            if name in tables:
+                fingerprint.update(name.encode("utf-8"))
+                fingerprint.update(_ipc_bytes(tables[name]))
+        fingerprint = fingerprint.hexdigest()
+
+        current = self.current_version()
+        if current and self.manifest(current).get("fingerprint") == fingerprint:
+            return current
+
+        version = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 1_000_000_000:09d}"
+        staging = self.root / f".{version}.tmp"
+        staging.mkdir()
+        for name, table in tables.items():
+            # Uncompressed IPC files, so readers can map the buffers without decoding
+            with pa.OSFile(str(staging / f"{name}.arrow"), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        manifest = {"version": version, "created": time.time(), "fingerprint": fingerprint, "frames": sorted(tables)}
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(staging, self.root / version)
+        _write_atomic(self.root / CURRENT_FILE, version)
+        self.collect_garbage()
+        return version
+
+    # ------------------------------------- Reading --------------------------------------------- #
+
+    # (frames, version) of the current version, memory-mapped; (None, None) when nothing
+    # has been published. The mapping is reused until CURRENT moves, and this process
+    # holds a lease on the version it maps.
+    def load(self):
+        for _ in range(LOAD_ATTEMPTS):
+            version = self.current_version()
+            if version is None:
+                return None, None
+            with self._lock:
+                if version != self._version:
+                    try:
+                        data = self._map(version)
+                    except FileNotFoundError:
+                        continue  # collected after CURRENT moved on; read it again
+                    if self._version:
+                        self._release(self._version)
+                    self._version, self._data = version, data
+                # Callers may add columns; give them their own frames over the shared buffers
+                return {name: frame.copy(deep=False) for name, frame in self._data.items()}, version
+        raise RuntimeError(f"Snapshot store {self.root} kept changing during {LOAD_ATTEMPTS} load attempts")
+
+    # Lease `version`, then map its frames. The version must still be current once the
+    # lease exists: collect_garbage never deletes the current version, and any later
+    # collection sees the lease, so the files cannot vanish while they are mapped.
+    def _map(self, version):
+        self._acquire(version)
+        try:
+            if self.current_version() != version:
+                raise FileNotFoundError(f"snapshot {version} is no longer current")
+            data = {}
+            for name in self.manifest(version)["frames"]:
+                source = pa.memory_map(str(self.root / version / f"{name}.arrow"), "r")
+                table = pa.ipc.open_file(source).read_all()
+                data[name] = table.to_pandas(types_mapper=pd.ArrowDtype)
+            return data
+        except BaseException:
+            self._release(version)
+            raise
+
+    def _lease_path(self, version, pid=None):
+        return self.root / version / LEASES_DIR / str(pid or os.getpid())
+
+    def _acquire(self, version):
+        lease = self._lease_path(version)
+        lease.parent.mkdir(exist_ok=True)
+        lease.touch()
+
+    def _release(self, version):
+        self._lease_path(version).unlink(missing_ok=True)
+
+    def live_leases(self, version):
+        leases = self.root / version / LEASES_DIR
+        if not leases.is_dir():
+            return []
+        return [int(lease.name) for lease in leases.iterdir() if lease.name.isdigit() and _pid_alive(int(lease.name))]
+
+    # Delete every version other than the current one that no live process leases.
+    # Mapped files stay readable after deletion on POSIX, so a late reader is never cut off.
+    def collect_garbage(self):
+        current = self.current_version()
+        removed = []
+        for version in self.versions():
+            if version != current and not self.live_leases(version):
+                shutil.rmtree(self.root / version, ignore_errors=True)
+                removed.append(version)
+        for staging in self.root.glob(".*.tmp"):
+            # Leftovers of a publisher that died mid-write
+            if time.time() - staging.stat().st_mtime > 3600:
+                if staging.is_dir():
+                    shutil.rmtree(staging, ignore_errors=True)
+                else:
+                    staging.unlink(missing_ok=True)
+        return removed
+
+
+def _ipc_bytes(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("publish", "status", "gc"):
+        sys.exit("Usage: python snapshot_store.py publish|status|gc")
+    import data_backend  # loads .env, which may set SNAPSHOT_DIR
+    store = SnapshotStore(os.getenv("SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
+    if sys.argv[1] == "publish":
+        import dashboard
+        print(store.publish(dashboard.prepare_dashboard_data(data_backend.get_database())))
+    elif sys.argv[1] == "status":
+        current = store.current_version()
+        for version in store.versions():
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  leases: {store.live_leases(version)}")
+    else:
+        print(f"Removed {len(store.collect_garbage())} version(s)")
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+import batch
+
+
+@pytest.mark.parametrize("error, transient", [
+    ("Error generating query: Request timed out.", True),
+    ("Error generating query: Error code: 429 - rate limit exceeded", True),
+    ("Error parsing JSON query: Expecting value: line 1 column 1 (char 0)", False),
+    ("Error generating query: No recorded completion for this request; re-record the cassette", False),
+    ("This question would scan all 250,000 documents in `teams` (unfiltered aggregation).", False),
+])
+def test_only_transient_errors_are_retried(error, transient):
+    assert batch.is_transient(error) is transient
+
+
+def test_checkpoint_uses_last_record_per_id(tmp_path):
+    output = tmp_path / "answers.jsonl"
+    records = [{"id": "1", "error": "timeout"}, {"id": "1", "error": None},
+               {"id": "2", "error": None}, {"id": "2", "error": "timeout"}]
+    output.write_text("".join(json.dumps(r) + "\n" for r in records) + '{"id": "3", "err', encoding="utf-8")
+    assert batch.load_checkpoint(output) == {"1"}
@@ -0,0 +1,67 @@
+import chat_history
+from chat_history import ChatStore, build_context, estimate_tokens
+
+
+def conversation(*turns):
+    messages = []
+    for question, answer, error in turns:
+        messages.append({"role": "user", "content": question})
+        messages.append({"role": "assistant", "content": answer, "error": error})
+    return messages
+
+
+def test_empty_conversation_has_no_context():
+    assert build_context([]) == ""
+    assert build_context([{"role": "user", "content": "Who leads tax?"}]) == ""
+
+
+def test_recent_turns_are_kept_verbatim():
+    context = build_context(conversation(("Who leads tax?", "Alex Carter.", None),
+                                         ("And their phone?", "716-555-0100", None)))
+    assert context == ("User: Who leads tax?\nAssistant: Alex Carter.\n"
+                       "User: And their phone?\nAssistant: 716-555-0100")
+
+
+def test_failed_turns_are_skipped():
+    context = build_context(conversation(("Who leads tax?", "Alex Carter.", None),
+                                         ("Broken question", "Error: timeout", "timeout")))
+    assert "Broken question" not in context
+    assert "timeout" not in context
+    assert "Alex Carter." in context
+
+
+def test_context_stays_within_budget_and_summarizes_older_questions():
+    turns = [(f"Question number {i} about the practice areas of firm {i}?", "An answer. " * 20, None)
+             for i in range(30)]
+    context = build_context(conversation(*turns), max_tokens=200)
+
+    assert estimate_tokens(context) <= 200
+    lines = context.split("\n")
+    assert lines[0].startswith("Earlier the user asked: Question number ")
+    # The newest turn is verbatim, older ones only appear in the summary, newest first
+    assert lines[-2] == f"User: {turns[-1][0]}"
+    summarized = lines[0][len("Earlier the user asked: "):].split("; ")
+    assert summarized[0] == turns[-1 - (len(lines) - 1) // 2][0]
+    assert "Question number 0 " not in context
+
+
+def test_long_answers_are_shortened():
+    context = build_context(conversation(("Describe the firm", "word " * 500, None)))
+    answer = context.split("\n")[1]
+    assert len(answer) <= len("Assistant: ") + chat_history.ANSWER_EXCERPT_CHARS
+    assert answer.endswith("...")
+
+
+def test_store_returns_recent_messages_oldest_first(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.sqlite3"))
+    for message in conversation(("q1", "a1", None), ("q2", "a2", "failed")):
+        store.append("session", message)
+    store.append("other", {"role": "user", "content": "elsewhere"})
+
+    assert store.count("session") == 4
+    recent = store.recent("session", 3)
+    assert [m["content"] for m in recent] == ["a1", "q2", "a2"]
+    assert recent[-1]["error"] == "failed"
+    store.clear("session")
+    assert store.count("session") == 0
+    assert store.count("other") == 1
@@ -0,0 +1,103 @@
+import pytest
+
+from data_backend import LocalDatabase, _group, _matches, _project
+
+DOC = {
+    "_id": 1, "name": "Alex Carter", "firm": "Hodgson Russ", "years": 12,
+    "tags": ["tax", "estate"], "contact": {"city": "Buffalo", "phone": "716"},
+    "roles": [{"title": "Partner", "since": 2015}, {"title": "Associate", "since": 2010}],
+}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({}, True),
+    ({"firm": "Hodgson Russ"}, True),
+    ({"firm": "Phillips Lytle"}, False),
+    ({"tags": "tax"}, True),
+    ({"tags": ["tax", "estate"]}, True),
+    ({"contact.city": "Buffalo"}, True),
+    ({"roles.title": "Partner"}, True),
+    ({"missing": None}, True),
+    ({"years": {"$gte": 10, "$lt": 20}}, True),
+    ({"years": {"$gt": "10"}}, False),
+    ({"name": {"$regex": "^alex", "$options": "i"}}, True),
+    ({"name": {"$regex": "^alex"}}, False),
+    ({"firm": {"$in": ["Phillips Lytle", "Hodgson Russ"]}}, True),
+    ({"firm": {"$nin": ["Hodgson Russ"]}}, False),
+    ({"firm": {"$ne": "Hodgson Russ"}}, False),
+    ({"missing": {"$exists": False}}, True),
+    ({"tags": {"$size": 2}}, True),
+    ({"tags": {"$all": ["estate", "tax"]}}, True),
+    ({"roles": {"$elemMatch": {"title": "Partner", "since": {"$gte": 2014}}}}, True),
+    ({"roles": {"$elemMatch": {"title": "Associate", "since": {"$gte": 2014}}}}, False),
+    ({"$or": [{"firm": "Phillips Lytle"}, {"years": 12}]}, True),
+    ({"$and": [{"firm": "Hodgson Russ"}, {"years": 13}]}, False),
+    ({"$nor": [{"firm": "Phillips Lytle"}]}, True),
+])
+def test_matches(query, expected):
+    assert _matches(DOC, query) is expected
+
+
+def test_matches_rejects_unsupported_operators():
+    with pytest.raises(ValueError):
+        _matches(DOC, {"$where": "true"})
+    with pytest.raises(ValueError):
+        _matches(DOC, {"name": {"$text": "alex"}})
+
+
+@pytest.mark.parametrize("projection, expected", [
+    ({"name": 1}, {"_id": 1, "name": "Alex Carter"}),
+    ({"name": 1, "_id": 0}, {"name": "Alex Carter"}),
+    ({"contact.city": 1, "_id": 0}, {"contact.city": "Buffalo"}),
+    ({"upper": {"$toUpper": "$firm"}, "_id": 0}, {"upper": "HODGSON RUSS"}),
+    ({"tag_count": {"$size": "$tags"}, "_id": 0}, {"tag_count": 2}),
+    ({"_id": 0}, {k: v for k, v in DOC.items() if k != "_id"}),
+])
+def test_project_inclusive(projection, expected):
+    assert _project(DOC, projection) == expected
+
+
+def test_project_exclusive_keeps_other_fields():
+    result = _project(DOC, {"roles": 0, "contact": 0})
+    assert set(result) == {"_id", "name", "firm", "years", "tags"}
+
+
+def test_group_accumulators():
+    documents = [
+        {"firm": "A", "years": 3, "city": "Buffalo"},
+        {"firm": "A", "years": 5, "city": "Rochester"},
+        {"firm": "B", "years": 8, "city": "Buffalo"},
+        {"firm": "A", "years": None, "city": "Buffalo"},
+    ]
+    result = _group(documents, {
+        "_id": "$firm", "count": {"$sum": 1}, "total": {"$sum": "$years"}, "average": {"$avg": "$years"},
+        "longest": {"$max": "$years"}, "cities": {"$addToSet": "$city"}, "first": {"$first": "$city"},
+    })
+    by_firm = {row["_id"]: row for row in result}
+    assert by_firm["A"] == {"_id": "A", "count": 3, "total": 8, "average": 4, "longest": 5,
+                            "cities": ["Buffalo", "Rochester"], "first": "Buffalo"}
+    assert by_firm["B"]["count"] == 1
+
+
+def test_group_by_compound_key_and_whole_collection():
+    documents = [{"firm": "A", "city": "Buffalo"}, {"firm": "A", "city": "Buffalo"}, {"firm": "A", "city": "Albany"}]
+    result = _group(documents, {"_id": {"firm": "$firm", "city": "$city"}, "n": {"$sum": 1}})
+    assert sorted((row["_id"]["city"], row["n"]) for row in result) == [("Albany", 1), ("Buffalo", 2)]
+    assert _group(documents, {"_id": None, "n": {"$sum": 1}}) == [{"_id": None, "n": 3}]
+
+
+def test_group_rejects_unsupported_accumulators():
+    with pytest.raises(ValueError):
+        _group([DOC], {"_id": "$firm", "x": {"$stdDevPop": "$years"}})
+
+
+def test_aggregate_pipeline():
+    db = LocalDatabase({"teams": [
+        {"firm": "A", "position": "Partner"}, {"firm": "A", "position": "Associate"}, {"firm": "B", "position": "Partner"},
+    ]})
+    result = list(db["teams"].aggregate([
+        {"$match": {"position": "Partner"}},
+        {"$group": {"_id": "$firm", "partners": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ]))
+    assert result == [{"_id": "A", "partners": 1}, {"_id": "B", "partners": 1}]
@@ -0,0 +1,33 @@
+import pytest
+
+from institutions import extract_institutions, resolve_institution
+
+
+@pytest.mark.parametrize("name", [
+    "SUNY Buffalo Law", "UB Law", "University at Buffalo School of Law", "State University of New York at Buffalo",
+    "Suny-Buffalo Law School", "Univeristy at Buffalo Law School",
+])
+def test_buffalo_variants_resolve_to_ub(name):
+    assert resolve_institution(name) == "University at Buffalo"
+
+
+def test_buffalo_state_is_not_ub():
+    assert resolve_institution("SUNY Buffalo State") == "Buffalo State University"
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("New York Law School", "New York Law School"),
+    ("NYU School of Law", "New York University"),
+    ("New York University Law", "New York University"),
+    ("Rochester Law", None),
+    ("University of Rochester", "University of Rochester"),
+    ("Rochester University", "University of Rochester"),
+])
+def test_shared_place_names_do_not_merge_institutions(name, expected):
+    assert resolve_institution(name) == expected
+
+
+def test_extract_institutions_dedupes_and_keeps_unknown_schools():
+    education = "['UB Law, J.D.', 'SUNY Buffalo, B.A.', 'Example State College, B.S.']"
+    assert extract_institutions(education) == ("University at Buffalo", "Example State College")
+    assert extract_institutions("[]") == ("Unknown",)
@@ -0,0 +1,19 @@
+import pytest
+
+import llm_backend
+
+
+def test_replay_without_cassette_asks_to_record_first(tmp_path):
+    with pytest.raises(ValueError, match="LLM_BACKEND=record"):
+        llm_backend.ReplayBackend(tmp_path / "missing.jsonl")
+
+
+def test_replay_serves_recorded_completion(tmp_path):
+    messages = [{"role": "user", "content": "How many partners?"}]
+    key = llm_backend.request_key(messages, "gpt-4", 50)
+    cassette = tmp_path / "llm.jsonl"
+    cassette.write_text(f'{{"key": "{key}", "text": "Twelve.", "prompt_tokens": 5, "completion_tokens": 2}}\n',
+                        encoding="utf-8")
+    completion = llm_backend.ReplayBackend(cassette, latency="0").complete(messages, "gpt-4", 50)
+    assert completion.text == "Twelve."
+    assert completion.cached
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+import llm_scheduler
+from llm_backend import Completion
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FakeBackend:
+    def __init__(self, failures=(), gate=None):
+        self.calls = []
+        self.failures = list(failures)
+        self.gate = gate
+        self.lock = threading.Lock()
+
+    def complete(self, messages, model, max_tokens, temperature=None):
+        with self.lock:
+            self.calls.append(messages[0]["content"])
+            failure = self.failures.pop(0) if self.failures else None
+        if self.gate is not None:
+            self.gate.wait(5)
+        if failure is not None:
+            raise failure
+        return Completion(text=f"answer to {messages[0]['content']}", prompt_tokens=1, completion_tokens=1,
+                          cached=False)
+
+
+def ask(scheduler, prompt, results, level=llm_scheduler.INTERACTIVE):
+    with llm_scheduler.priority(level):
+        results.append(scheduler.complete([{"role": "user", "content": prompt}], "gpt-4", 10))
+
+
+def test_identical_concurrent_prompts_are_coalesced():
+    gate = threading.Event()
+    backend = FakeBackend(gate=gate)
+    scheduler = llm_scheduler.SchedulingBackend(backend)
+    results = []
+    threads = [threading.Thread(target=ask, args=(scheduler, "same", results)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert backend.calls == ["same"]
+    assert scheduler.stats["coalesced"] == 2
+    assert sorted(completion.cached for completion in results) == [False, True, True]
+
+
+def test_interactive_requests_run_before_batch():
+    gate = threading.Event()
+    backend = FakeBackend(gate=gate)
+    scheduler = llm_scheduler.SchedulingBackend(backend, max_concurrency=1)
+    results = []
+    threads = [threading.Thread(target=ask, args=(scheduler, "blocker", results))]
+    threads[0].start()
+    time.sleep(0.1)  # the only dispatcher is now busy with the blocker
+    for prompt, level in [("batch 1", llm_scheduler.BATCH), ("batch 2", llm_scheduler.BATCH),
+                          ("interactive", llm_scheduler.INTERACTIVE)]:
+        threads.append(threading.Thread(target=ask, args=(scheduler, prompt, results, level)))
+        threads[-1].start()
+        time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert backend.calls == ["blocker", "interactive", "batch 1", "batch 2"]
+
+
+def test_retryable_errors_are_retried_through_the_queue():
+    backend = FakeBackend(failures=[RateLimited(), RateLimited()])
+    scheduler = llm_scheduler.SchedulingBackend(backend, requests_per_minute=600, base_delay=0.01)
+    results = []
+    ask(scheduler, "question", results)
+
+    assert results[0].text == "answer to question"
+    assert backend.calls == ["question"] * 3
+    assert scheduler.stats["retries"] == 2
+    # Every attempt took its own request credit: 100 per burst, 3 used
+    assert scheduler.requests._tokens == pytest.approx(97, abs=0.5)
+
+
+def test_gives_up_after_max_retries():
+    backend = FakeBackend(failures=[RateLimited()] * 3)
+    scheduler = llm_scheduler.SchedulingBackend(backend, max_retries=2, base_delay=0.01)
+    with pytest.raises(RateLimited):
+        ask(scheduler, "question", [])
+    assert len(backend.calls) == 3
+    assert scheduler.stats["failed"] == 1
+
+
+def test_other_errors_are_not_retried():
+    backend = FakeBackend(failures=[ValueError("bad request")])
+    scheduler = llm_scheduler.SchedulingBackend(backend, base_delay=0.01)
+    with pytest.raises(ValueError):
+        ask(scheduler, "question", [])
+    assert backend.calls == ["question"]
+    assert scheduler.stats["retries"] == 0
+
+
+def test_retry_after_is_a_lower_bound(monkeypatch):
+    class Throttled(RateLimited):
+        response = type("Response", (), {"headers": {"retry-after": "0.3"}})()
+
+    backend = FakeBackend(failures=[Throttled()])
+    scheduler = llm_scheduler.SchedulingBackend(backend, base_delay=0.01)
+    start = time.monotonic()
+    ask(scheduler, "question", [])
+    assert time.monotonic() - start >= 0.3
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from practice_search import PracticeSearchIndex
+
+PRACTICES = pd.DataFrame([
+    {"standardized_title": "Immigration Law", "firm": "Hodgson Russ",
+     "specializations": "['Employment visas', 'Naturalization']"},
+    {"standardized_title": "Immigration Law", "firm": "Phillips Lytle", "specializations": "['Asylum']"},
+    {"standardized_title": "Tax Law", "firm": "Hodgson Russ", "specializations": "['Estate planning', 'Tax disputes']"},
+    {"standardized_title": "Intellectual Property", "firm": "Phillips Lytle", "specializations": "['Patents']"},
+    {"standardized_title": "Real Estate", "firm": "Barclay Damon", "specializations": "['Zoning', 'Estate disputes']"},
+])
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PracticeSearchIndex(PRACTICES)
+
+
+def titles(index, **kwargs):
+    return [index.titles[entry_id] for entry_id in index.search(**kwargs)]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("", ["Immigration Law", "Intellectual Property", "Real Estate", "Tax Law"]),
+    ("tax", ["Tax Law"]),
+    ("im", ["Immigration Law"]),
+    ("i", ["Immigration Law", "Intellectual Property"]),
+    ("immigation", ["Immigration Law"]),
+    ("imigr", ["Immigration Law"]),
+    ("estate real", ["Real Estate"]),
+    ("law", ["Immigration Law", "Tax Law"]),
+    ("bankruptcy", []),
+])
+def test_title_search(index, query, expected):
+    assert titles(index, query=query) == expected
+
+
+def test_title_prefix_ranks_first(index):
+    assert titles(index, query="law")[0] == "Immigration Law"
+    assert titles(index, query="estate") == ["Real Estate"]
+
+
+def test_firm_filter(index):
+    assert titles(index, firms=["Phillips Lytle"]) == ["Immigration Law", "Intellectual Property"]
+    assert titles(index, query="law", firms=["Phillips Lytle"]) == ["Immigration Law"]
+
+
+def test_specialization_filter(index):
+    assert titles(index, specialization="estate") == ["Real Estate", "Tax Law"]
+    assert titles(index, specialization="estate disputes") == ["Real Estate", "Tax Law"]
+    assert titles(index, specialization="patnts") == ["Intellectual Property"]
+
+
+def test_frame_lists_firms(index):
+    frame = index.frame(index.search("immigration"))
+    assert frame.to_dict("records") == [
+        {"Practice Area": "Immigration Law", "Offered by Firm": "Hodgson Russ, Phillips Lytle"}]
+
+
+def test_lookup_survives_a_concurrent_clear():
+    # Another session clearing the shared memo right after this one stored its result
+    class ClearedAfterStore(dict):
+        def __setitem__(self, key, value):
+            super().__setitem__(key, value)
+            self.clear()
+
+    index = PracticeSearchIndex(PRACTICES)
+    index._lookups = ClearedAfterStore()
+    assert [index.titles[entry_id] for entry_id in index.search("tax")] == ["Tax Law"]
@@ -0,0 +1,17 @@
+from profiling import NULL_PROFILER, get_profiler
+
+
+def test_query_parameter_is_ignored_without_env(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_PROFILE", raising=False)
+    assert get_profiler("cprofile") is NULL_PROFILER
+
+
+def test_param_mode_profiles_only_requested_renders(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_PROFILE", "param")
+    assert get_profiler(None) is NULL_PROFILER
+    assert get_profiler("timing").enabled
+
+
+def test_env_mode_profiles_every_render(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_PROFILE", "1")
+    assert get_profiler(None).mode == "timing"
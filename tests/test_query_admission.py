@@ -0,0 +1,111 @@
+import pytest
+
+import chatbot
+import query_admission
+from data_backend import LocalDatabase
+
+DOCS = 10_000
+
+
+@pytest.fixture(autouse=True)
+def clear_plan_cache():
+    query_admission._plan_cache.clear()
+    yield
+    query_admission._plan_cache.clear()
+
+
+@pytest.fixture
+def db():
+    return LocalDatabase({"careers": [
+        {"_id": i, "firm": f"Firm {i % 7}", "title": "Partner" if i % 3 else "Associate"} for i in range(DOCS)
+    ]})
+
+
+def test_small_collection_is_allowed():
+    db = LocalDatabase({"careers": [{"_id": 1, "firm": "A"}]})
+    query_data, decision = query_admission.admit_query({"collection": "careers", "query": {}}, db)
+    assert decision["action"] == "allow"
+    assert "limit" not in query_data
+
+
+def test_unbounded_find_gets_default_limit(db):
+    query_data, decision = query_admission.admit_query({"collection": "careers", "query": {"firm": "Firm 1"}}, db)
+    assert decision["action"] == "limit"
+    assert query_data["limit"] == query_admission.DEFAULT_LIMIT
+
+
+def test_large_limit_is_not_served_from_small_limit_plan(db):
+    query_admission.admit_query({"collection": "careers", "query": {"firm": "Firm 1"}, "limit": 5}, db)
+    query_data, decision = query_admission.admit_query(
+        {"collection": "careers", "query": {"firm": "Firm 2"}, "limit": 100_000}, db)
+    assert not decision["cache_hit"]
+    assert decision["action"] == "limit"
+    assert query_data["limit"] == query_admission.DEFAULT_LIMIT
+
+
+def test_same_shape_hits_plan_cache(db):
+    query_admission.admit_query({"collection": "careers", "query": {"firm": "Firm 1"}, "limit": 5}, db)
+    _, decision = query_admission.admit_query({"collection": "careers", "query": {"firm": "Firm 2"}, "limit": 10}, db)
+    assert decision["cache_hit"]
+    assert decision["action"] == "allow"
+
+
+def test_filtered_totals_run_uncapped(db):
+    pipeline = [{"$match": {"title": "Partner"}}, {"$group": {"_id": "$firm", "count": {"$sum": 1}}},
+                {"$project": {"count": 1}}]
+    query_data, decision = query_admission.admit_query({"collection": "careers", "aggregation": pipeline}, db)
+    assert decision["action"] == "allow"
+    assert query_data["aggregation"] == pipeline
+
+
+def test_unfiltered_totals_are_rejected_not_capped(db):
+    query_data = {"collection": "careers", "aggregation": [{"$count": "total"}]}
+    _, decision = query_admission.admit_query(query_data, db)
+    assert decision["action"] == "reject"
+    assert "without a filter" in query_admission.rejection_message(query_data, decision)
+
+
+def test_streaming_aggregation_gets_limit(db):
+    pipeline = [{"$match": {"title": "Partner"}}, {"$project": {"firm": 1}}]
+    query_data, decision = query_admission.admit_query({"collection": "careers", "aggregation": pipeline}, db)
+    assert decision["action"] == "limit"
+    assert query_data["aggregation"][-1] == {"$limit": query_admission.DEFAULT_LIMIT}
+
+
+def test_unanchored_regex_in_match_is_rejected(db, monkeypatch):
+    monkeypatch.setattr(query_admission, "MAX_SCANNED_DOCS", DOCS - 1)
+    pipeline = [{"$match": {"title": {"$regex": "part", "$options": "i"}}}, {"$count": "n"}]
+    _, decision = query_admission.admit_query({"collection": "careers", "aggregation": pipeline}, db)
+    assert decision["action"] == "reject"
+
+
+def test_filter_in_query_is_attached_to_aggregation(db):
+    results, notice = chatbot.run_query({
+        "collection": "careers", "query": {"firm": "Firm 1"},
+        "aggregation": [{"$group": {"_id": "$firm", "count": {"$sum": 1}}}],
+    }, db)
+    assert results == [{"_id": "Firm 1", "count": sum(1 for i in range(DOCS) if i % 7 == 1)}]
+    assert notice is None
+
+
+def test_truncated_find_carries_notice(db):
+    results, notice = chatbot.run_query({"collection": "careers", "query": {}}, db)
+    assert len(results) == query_admission.DEFAULT_LIMIT
+    assert notice
+
+
+def test_unfiltered_aggregation_over_huge_collection_is_rejected(db, monkeypatch):
+    monkeypatch.setattr(query_admission, "MAX_SCANNED_DOCS", DOCS - 1)
+    query_data = {"collection": "careers", "aggregation": [{"$group": {"_id": "$firm", "n": {"$sum": 1}}}]}
+    _, decision = query_admission.admit_query(query_data, db)
+    assert decision["action"] == "reject"
+    assert "10,000 documents" in query_admission.rejection_message(query_data, decision)
+
+
+def test_explain_failure_fails_open(db, monkeypatch):
+    def explain(*args, **kwargs):
+        raise RuntimeError("not supported")
+    monkeypatch.setattr(db, "command", explain)
+    query_data, decision = query_admission.admit_query({"collection": "careers", "query": {}}, db)
+    assert decision["action"] == "allow"
+    assert "limit" not in query_data
@@ -0,0 +1,42 @@
+import logging
+
+import pytest
+
+import response_router
+from response_router import route
+
+GROUP_QUERY = {"collection": "teams", "aggregation": [{"$group": {"_id": "$firm", "count": {"$sum": 1}}}]}
+
+
+@pytest.mark.parametrize("results, question, query_data, tier, text", [
+    ([], "Who leads tax?", None, "template", "No matching records were found."),
+    ([{"count": 1429}], "How many partners?", None, "template", "**Count:** 1,429"),
+    ([{"name": "Alex Carter"}, {"name": "Morgan Patel"}, {"name": "Alex Carter"}], "Who are the partners?", None,
+     "template", "**Name** (2):\n- Alex Carter\n- Morgan Patel"),
+    ([{"_id": "Hodgson Russ", "count": 12}, {"_id": "Phillips Lytle", "count": 7}], "Partners per firm?", GROUP_QUERY,
+     "template", "**Count** by firm:\n- Hodgson Russ: 12\n- Phillips Lytle: 7"),
+    ([{"name": "Alex Carter", "phone": "716-555-0100"}], "Alex's phone?", None,
+     "template", "**Name:** Alex Carter\n**Phone:** 716-555-0100"),
+    ([{"name": "A|B", "education": "['UB Law', 'Cornell']"}, {"name": "C", "education": None}], "Education?", None,
+     "template", "2 results:\n\n| Name | Education |\n|---|---|\n| A\\|B | UB Law, Cornell |\n| C |  |"),
+    ([{"count": 3}], "Summarize the tax practice", None, "full", None),
+    ([{"count": 3}], "Compare the two firms", None, "full", None),
+])
+def test_route(results, question, query_data, tier, text):
+    assert route(results, question, query_data) == (tier, text)
+
+
+def test_results_needing_words_go_to_fast_tier():
+    results = [{"about": "x" * (response_router.TEMPLATE_MAX_VALUE_CHARS + 1)}]
+    assert route(results, "What does Alex do?") == ("fast", None)
+
+
+def test_large_results_go_to_full_tier():
+    results = [{"name": f"Person {i}", "firm": "Hodgson Russ", "about": "y" * 150} for i in range(40)]
+    assert route(results, "Who works there?") == ("full", None)
+
+
+def test_tier_is_logged(caplog):
+    with caplog.at_level(logging.INFO, logger="response_router"):
+        route([{"count": 1}], "How many?")
+    assert "response tier template" in caplog.text
@@ -0,0 +1,33 @@
+import pandas as pd
+
+import snapshot_store
+
+
+def frames(title):
+    return {"practices": pd.DataFrame({"firm": ["A"], "title": [title]})}
+
+
+def test_load_maps_current_version_and_leases_it(tmp_path):
+    store = snapshot_store.SnapshotStore(tmp_path)
+    version = store.publish(frames("Tax"))
+    data, loaded = store.load()
+    assert loaded == version
+    assert list(data["practices"]["title"]) == ["Tax"]
+    assert store.live_leases(version)
+
+
+def test_load_retries_when_version_is_collected_under_it(tmp_path, monkeypatch):
+    store = snapshot_store.SnapshotStore(tmp_path)
+    stale = store.publish(frames("Tax"))
+    fresh = store.publish(frames("Immigration"))
+    assert stale not in store.versions()
+
+    # The first read of CURRENT still returns the version that has since been collected
+    reads = iter([stale])
+    current_version = store.current_version
+    monkeypatch.setattr(store, "current_version", lambda: next(reads, None) or current_version())
+
+    data, loaded = store.load()
+    assert loaded == fresh
+    assert list(data["practices"]["title"]) == ["Immigration"]
+    assert not (tmp_path / stale).exists()
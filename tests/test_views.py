@@ -0,0 +1,15 @@
+import data_backend
+import views
+
+
+def test_missing_view_is_read_from_sources_without_writing():
+    db = data_backend.open_database("local")
+    collection = views.view_collection(db)
+    assert collection.count_documents({}) > 0
+    assert db[views.VIEW_NAME].estimated_document_count() == 0
+
+
+def test_built_view_is_read_directly():
+    db = data_backend.open_database("local")
+    views.refresh_view(db)
+    assert views.view_collection(db) is db[views.VIEW_NAME]
@@ -0,0 +1,131 @@
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+# Lightweight per-turn tracing. Spans borrow the OpenTelemetry field names (trace/span
+# ids, parent ids, unix-nano timestamps, attributes, status) and are written to
+# TRACE_PATH as JSONL, one span per line, to be read by hand or by scripts. This is not
+# the OTLP wire format: there is no resourceSpans/scopeSpans envelope, attributes are
+# plain JSON values and the status code is "OK"/"ERROR", so shipping the spans to a
+# collector needs a conversion step.
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def set_error(self, message):
+        self.status = "ERROR"
+        self.error = str(message)
+
+    def end(self):
+        if self.end_ns is None:
+            self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+            self.end_ns = self.start_ns + int(self.duration_ms * 1_000_000)
+
+    def to_dict(self):
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": self.duration_ms,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.error},
+        }
+
+
+class Trace:
+    def __init__(self, name, attributes=None):
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(name, self.trace_id, attributes=attributes)
+        self.spans = [self.root]
+
+    def to_dicts(self):
+        return [span.to_dict() for span in self.spans]
+
+
+# Open a trace for one unit of work (a chat turn); spans opened inside it become its
+# children and the whole trace is exported when the block exits.
+@contextmanager
+def start_trace(name, **attributes):
+    trace = Trace(name, attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except Exception as e:
+        trace.root.set_error(e)
+        raise
+    finally:
+        trace.root.end()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        export(trace)
+
+
+# Time a stage inside the active trace. Outside a trace the span is still timed but
+# not recorded anywhere, so instrumented functions can be called on their own.
+@contextmanager
+def span(name, **attributes):
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    current = Span(name, trace.trace_id if trace else None, parent.span_id if parent else None, attributes)
+    if trace:
+        trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set_error(e)
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+
+
+# Attach attributes (token counts, row counts, cache hits, ...) to the innermost open span
+def set_attributes(**attributes):
+    current = _current_span.get()
+    if current is not None:
+        current.set_attributes(**attributes)
+
+
+# Mark the innermost open span as failed without raising (for stages that turn
+# exceptions into error values)
+def record_error(error):
+    current = _current_span.get()
+    if current is not None:
+        current.set_error(error)
+
+
+def export(trace):
+    path = os.getenv("TRACE_PATH")
+    if not path:
+        return
+    lines = "".join(json.dumps(span, default=str) + "\n" for span in trace.to_dicts())
+    with _export_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(lines)
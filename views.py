@@ -0,0 +1,180 @@
+import ast
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import data_backend
+
+# Materialized `practice_members` view: one document per (firm, practice, member)
+# joining `practices` to the member's `teams` profile and the firm's open `careers`.
+# Questions such as "show the members of the Immigration Law practice with their
+# phone numbers" become a single indexed read instead of a second query the
+# single-collection query format cannot express.
+#
+# The join is computed here rather than with $lookup because `team members` and
+# `leaders` are stored as Python-literal strings that the server cannot unpack.
+# Refreshes are incremental: each row carries a hash of its sources, and only rows
+# whose hash changed are rewritten (and vanished rows deleted).
+#
+# Only the commands below (and the warm-up, when WARMUP_REFRESH_VIEWS is set) write the
+# view. The chatbot only reads it; until it has been built, queries run against the
+# same rows joined in memory (see view_collection).
+#
+# Usage:
+#   python views.py refresh   # rebuild once
+#   python views.py watch     # refresh whenever a source collection changes
+
+VIEW_NAME = "practice_members"
+SOURCE_COLLECTIONS = ["practices", "teams", "careers"]
+
+VIEW_INDEXES = [
+    [("name", 1)],
+    [("practice_area", 1), ("firm", 1)],
+    [("firm", 1), ("is_leader", 1)],
+]
+
+# Profile fields copied from `teams` onto every row
+MEMBER_FIELDS = ["position", "email", "phone", "education", "admissions"]
+
+# Seconds the in-memory stand-in for a missing view is reused
+FALLBACK_TTL = float(os.getenv("VIEW_FALLBACK_TTL", "300"))
+
+_refreshed = set()
+_refresh_lock = threading.Lock()
+_fallback = {}
+_fallback_lock = threading.Lock()
+
+
+def _parse_list(value):
+    if isinstance(value, list):
+        return value
+    try:
+        parsed = ast.literal_eval(value) if isinstance(value, str) else []
+    except (ValueError, SyntaxError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def _row_id(firm, practice, name):
+    return f"{firm}|{practice}|{name}"
+
+
+def _source_hash(row):
+    payload = json.dumps(row, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def build_rows(db):
+    members = {}
+    for member in db["teams"].find({}, {"_id": 0, "name": 1, "firm": 1, **{f: 1 for f in MEMBER_FIELDS}}):
+        members[(member.get("firm"), member.get("name"))] = member
+
+    open_positions = {}
+    for career in db["careers"].find({}, {"_id": 0, "firm": 1, "position": 1}):
+        open_positions.setdefault(career.get("firm"), []).append(career.get("position"))
+
+    rows = {}
+    for practice in db["practices"].find({}, {"_id": 0}):
+        firm, title = practice.get("firm"), practice.get("title")
+        leaders = set(_parse_list(practice.get("leaders")))
+        for name in _parse_list(practice.get("team members")):
+            member = members.get((firm, name), {})
+            row = {
+                "firm": firm,
+                "practice": title,
+                "practice_area": practice.get("standardized_title", title),
+                "specializations": practice.get("specializations"),
+                "name": name,
+                "is_leader": name in leaders,
+                **{field: member.get(field) for field in MEMBER_FIELDS},
+                "firm_open_positions": sorted({p for p in open_positions.get(firm, []) if p}),
+            }
+            row["_source_hash"] = _source_hash(row)
+            rows[_row_id(firm, title, name)] = row
+    return rows
+
+
+# Bring the view up to date with its sources; returns counts of rows written and removed
+def refresh_view(db):
+    view = db[VIEW_NAME]
+    rows = build_rows(db)
+    existing = {doc["_id"]: doc.get("_source_hash") for doc in view.find({}, {"_id": 1, "_source_hash": 1})}
+
+    changed = [(row_id, row) for row_id, row in rows.items() if existing.get(row_id) != row["_source_hash"]]
+    removed = [row_id for row_id in existing if row_id not in rows]
+
+    if hasattr(view, "bulk_write"):
+        from pymongo import DeleteMany, ReplaceOne
+        operations = [ReplaceOne({"_id": row_id}, {"_id": row_id, **row}, upsert=True) for row_id, row in changed]
+        if removed:
+            operations.append(DeleteMany({"_id": {"$in": removed}}))
+        if operations:
+            view.bulk_write(operations, ordered=False)
+    else:
+        for row_id, row in changed:
+            view.replace_one({"_id": row_id}, {"_id": row_id, **row}, upsert=True)
+        if removed:
+            view.delete_many({"_id": {"$in": removed}})
+
+    for keys in VIEW_INDEXES:
+        view.create_index(keys)
+    return {"rows": len(rows), "written": len(changed), "removed": len(removed)}
+
+
+# Refresh the view once per process and database (cheap when nothing changed)
+def ensure_views(db):
+    with _refresh_lock:
+        if id(db) in _refreshed:
+            return
+        refresh_view(db)
+        _refreshed.add(id(db))
+
+
+# Collection to read the view from: the materialized view once it has been built,
+# else the rows joined in memory from the sources. Never writes.
+def view_collection(db):
+    view = db[VIEW_NAME]
+    if view.find_one({}, {"_id": 1}) is not None:
+        return view
+    with _fallback_lock:
+        entry = _fallback.get(id(db))
+        if entry is None or time.monotonic() - entry[0] > FALLBACK_TTL:
+            rows = [{"_id": row_id, **row} for row_id, row in build_rows(db).items()]
+            entry = (time.monotonic(), data_backend.LocalCollection(VIEW_NAME, rows))
+            _fallback[id(db)] = entry
+        return entry[1]
+
+
+# Refresh after every change to a source collection. Uses a change stream when the
+# deployment supports one (replica sets, Atlas), otherwise polls every `interval` seconds.
+def watch(db, interval=60, debounce=2.0):
+    refresh_view(db)
+    try:
+        pipeline = [{"$match": {"ns.coll": {"$in": SOURCE_COLLECTIONS}}}]
+        with db.watch(pipeline) as stream:
+            while stream.alive:
+                if stream.try_next() is None:
+                    continue
+                # Let a burst of writes settle, then refresh once for all of them
+                time.sleep(debounce)
+                while stream.try_next() is not None:
+                    pass
+                print(refresh_view(db))
+    except Exception as e:
+        print(f"Change streams unavailable ({e}); polling every {interval}s", file=sys.stderr)
+        while True:
+            time.sleep(interval)
+            print(refresh_view(db))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("refresh", "watch"):
+        sys.exit("Usage: python views.py refresh|watch")
+    database = data_backend.get_database()
+    if sys.argv[1] == "refresh":
+        print(refresh_view(database))
+    else:
+        watch(database)
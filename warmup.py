@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import data_backend
+import llm_backend
+
+# Background warm-up: builds everything the first click on "Go to Dashboard" or "Go to
+# Chatbot" would otherwise pay for, in worker threads, while the user is still on the
+# home page. Started once per process when app.py is first loaded and retriggered from
+# home_page; a run only repeats what is no longer cached, because every task goes
+# through the same cached getters the pages use. Pages never wait for the warm-up: whatever has not
+# finished is simply built on demand (and a page asking for the dashboard data while
+# the warm-up loads it waits for that one load rather than starting another).
+#
+# Phases run in order, the tasks within a phase in parallel:
+#   1. database and LLM clients
+#   2. dashboard data (collections + derived columns), chatbot views (refreshed only
+#      with WARMUP_REFRESH_VIEWS), query plans for the prompt's example queries
+#   3. dashboard figures for every firm, word cloud
+
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", "4"))
+# A finished run is not repeated for this many seconds
+WARMUP_INTERVAL = float(os.getenv("WARMUP_INTERVAL", "60"))
+# Let the warm-up write the chatbot views (see views.py); off by default, so serving
+# processes only read
+REFRESH_VIEWS = os.getenv("WARMUP_REFRESH_VIEWS", "").lower() in ("1", "true", "yes")
+
+_state = {"run": None, "started": False}
+_state_lock = threading.Lock()
+
+
+class WarmUp:
+    def __init__(self, database=None):
+        self.database = database
+        self.tasks = {}
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.finished is None
+
+    def _set(self, name, status):
+        with self._lock:
+            self.tasks[name] = status
+
+    def _task(self, name, func, *args):
+        self._set(name, "running")
+        try:
+            func(*args)
+            self._set(name, "done")
+        except Exception as e:
+            self._set(name, f"failed: {e}")
+
+    def _phase(self, executor, tasks):
+        for name, *_ in tasks:
+            self._set(name, "pending")
+        wait([executor.submit(self._task, *task) for task in tasks])
+
+    def run(self):
+        try:
+            with ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="warmup") as executor:
+                self._phase(executor, [("database", self._database), ("llm", self._llm)])
+                self._phase(executor, [
+                    ("dashboard_data", self._dashboard_data),
+                    ("views", self._views),
+                    ("query_plans", self._query_plans),
+                ])
+                if self.tasks["dashboard_data"] == "done":
+                    import dashboard
+                    data = dashboard.get_dashboard_data(self.database)
+                    self._phase(executor, [("wordcloud", dashboard.get_wordcloud_png, data)] + [
+                        (f"figures:{firm}", dashboard.get_dashboard_figures, data, firm)
+                        for firm in dashboard.get_firm_options(data)
+                    ])
+        except RuntimeError:
+            pass  # the interpreter is shutting down and no longer accepts work
+        finally:
+            self.finished = time.monotonic()
+
+    def _database(self):
+        self.database = self.database or data_backend.get_database()
+
+    def _llm(self):
+        try:
+            llm_backend.get_llm()
+        except ValueError:
+            pass  # no credentials: the chatbot reports it on the first question
+
+    def _dashboard_data(self):
+        import dashboard
+        dashboard.get_dashboard_data(self.database)
+
+    def _views(self):
+        import views
+        if REFRESH_VIEWS:
+            views.ensure_views(self.database)
+        else:
+            views.view_collection(self.database)
+
+    def _query_plans(self):
+        import chatbot
+        import query_admission
+        for query_data in chatbot.prompt_example_queries():
+            query_admission.admit_query(query_data, self.database)
+
+    def progress(self):
+        with self._lock:
+            tasks = dict(self.tasks)
+        done = sum(1 for status in tasks.values() if status == "done" or status.startswith("failed"))
+        return {
+            "state": "running" if self.running else "done",
+            "done": done,
+            "total": len(tasks),
+            "elapsed": round((self.finished or time.monotonic()) - self.started, 3),
+            "tasks": tasks,
+        }
+
+
+# Start a warm-up in the background unless one is running or finished recently;
+# returns the current run
+def start(database=None, force=False):
+    with _state_lock:
+        run = _state["run"]
+        if run is not None and (run.running or (not force and time.monotonic() - run.finished < WARMUP_INTERVAL)):
+            return run
+        run = WarmUp(database)
+        _state["run"] = run
+    threading.Thread(target=run.run, name="warmup", daemon=True).start()
+    return run
+
+
+# Start the first warm-up of this process; later calls (every Streamlit rerun of
+# app.py) do nothing and return the latest run
+def start_once(database=None):
+    with _state_lock:
+        if _state["started"]:
+            return _state["run"]
+        _state["started"] = True
+    return start(database)
+
+
+# Progress of the latest run ({"state": "idle"} before the first one)
+def progress():
+    run = _state["run"]
+    return run.progress() if run is not None else {"state": "idle", "done": 0, "total": 0, "tasks": {}}